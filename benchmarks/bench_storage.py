@@ -0,0 +1,88 @@
+from os import path
+from sys import argv
+from json import load, dump
+from time import perf_counter
+from random import Random
+from tempfile import TemporaryDirectory
+from argparse import ArgumentParser
+from src.common.storage import CODECS, ZstdCompressor, write_records, read_records, read_record
+
+WORDS = ("economía mercado banco gobierno elecciones inteligencia artificial datos salud tecnología "
+         "market rates inflation policy election model research health energy climate").split()
+
+def synthetic_articles(count, words_per_article=600, seed=7):
+    """
+    Build a scraped-news document of the given size.
+    """
+    rng = Random(seed)
+    return [
+        {
+            "title": " ".join(rng.choice(WORDS) for _ in range(10)),
+            "link": f"https://example.com/news/{idx}",
+            "content": " ".join(rng.choice(WORDS) for _ in range(words_per_article)),
+            "source": f"site-{idx % 8}",
+            "date": "2026-01-01"
+        }
+        for idx in range(count)
+    ]
+
+def timed(function, repeat):
+    """
+    Return the best wall time of a function over several runs.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        best = min(best, perf_counter() - start)
+    return best
+
+def run_benchmark(count, repeat):
+    data = synthetic_articles(count)
+    middle = str(count // 2)
+
+    with TemporaryDirectory() as tmp_dir:
+        json_file = path.join(tmp_dir, "scraped_news.json")
+
+        def write_json():
+            with open(json_file, "w", encoding="utf-8") as f:
+                dump(data, f, indent=4, ensure_ascii=False)
+
+        def load_json():
+            with open(json_file, "r", encoding="utf-8") as f:
+                return load(f)
+
+        results = {
+            "json": {
+                "write": timed(write_json, repeat),
+                "size": path.getsize(json_file),
+                "load": timed(load_json, repeat),
+                "one": timed(lambda: load_json()[count // 2], repeat)
+            }
+        }
+        for codec in CODECS:
+            if codec == "zstd" and ZstdCompressor is None:
+                continue
+            records_file = path.join(tmp_dir, f"scraped_news_{codec}.nlr")
+            results[f"nlr/{codec}"] = {
+                "write": timed(lambda: write_records(records_file, data, codec=codec), repeat),
+                "size": path.getsize(records_file),
+                "load": timed(lambda: read_records(records_file), repeat),
+                "one": timed(lambda: read_record(records_file, middle), repeat)
+            }
+            assert read_records(records_file) == data
+
+    print(f"{count} articles, best of {repeat}")
+    print(f"{'format':<10}{'size (KB)':>12}{'write (ms)':>12}{'load (ms)':>12}{'one article (ms)':>18}")
+    for name, result in results.items():
+        print(f"{name:<10}{result['size'] / 1024:>12.1f}{result['write'] * 1000:>12.2f}"
+              f"{result['load'] * 1000:>12.2f}{result['one'] * 1000:>18.3f}")
+    return results
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Compare the JSON and records inter-stage formats.")
+    parser.add_argument("--articles", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv[1:])
+    for count in args.articles:
+        run_benchmark(count, args.repeat)
\ No newline at end of file
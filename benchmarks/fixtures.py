@@ -0,0 +1,170 @@
+from os import path, makedirs
+from random import Random
+from threading import Thread
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+# Keywords per category, shared by both languages as the selector scores against the 'en' blocks
+CONTENT_BLOCKS = {
+    "Tecnologia": ["ai", "software", "chip", "robot", "datos", "algoritmo", "nube", "startup"],
+    "Economia": ["inflation", "market", "rates", "banco", "mercado", "empleo", "bolsa", "deuda"],
+    "Politica": ["election", "congress", "senado", "gobierno", "ley", "votos", "partido", "reforma"]
+}
+
+FILLER = {
+    "en": ("the report said on monday that officials expect the new plan to change how people work "
+           "across the region while analysts warned about risks in the coming months").split(),
+    "es": ("el informe publicado el lunes indica que las autoridades esperan que el nuevo plan cambie "
+           "la forma en que las personas trabajan en la región mientras los analistas advierten riesgos").split()
+}
+
+# Minimal stand-in for Readability.js exposing the same parse() contract
+READABILITY_STUB = """
+function Readability(doc) { this.doc = doc; }
+Readability.prototype.parse = function () {
+    var body = this.doc.querySelector("article") || this.doc.body;
+    return { title: this.doc.title, textContent: body.innerText };
+};
+"""
+
+def synthetic_article(rng, idx, words=400, languages=("en", "es")):
+    """
+    Build one news item in a random language, biased towards one category.
+    """
+    language = rng.choice(languages)
+    category = rng.choice(list(CONTENT_BLOCKS))
+    keywords = CONTENT_BLOCKS[category]
+    tokens = [rng.choice(keywords) if rng.random() < 0.08 else rng.choice(FILLER[language]) for _ in range(words)]
+    title = " ".join([rng.choice(keywords)] + [rng.choice(FILLER[language]) for _ in range(8)])
+    return {
+        "title": title.capitalize(),
+        "link": f"https://example.com/{language}/{idx}",
+        "content": " ".join(tokens).capitalize() + ".",
+        "source": f"site-{idx % 4}",
+        "date": "2026-01-01"
+    }
+
+def synthetic_corpus(count, words=400, seed=7):
+    """
+    Build a multilingual scraped-news corpus of the given size.
+    """
+    rng = Random(seed)
+    return [synthetic_article(rng, idx, words) for idx in range(count)]
+
+def synthetic_redacted(articles_per_section=3, seed=7):
+    """
+    Build a redacted document as produced by NewsRedactor.
+    """
+    rng = Random(seed)
+    def item(idx):
+        return {"summary": " ".join(rng.choice(FILLER["es"]) for _ in range(60)), "key_concept": "",
+                "link": f"https://example.com/es/{idx}"}
+    return {
+        "Main": item(0),
+        "sections": {category: [item(i) for i in range(articles_per_section)] for category in CONTENT_BLOCKS}
+    }
+
+def write_site(site_dir, count, words=400, seed=7):
+    """
+    Write an index page and its article pages, in the layout served to NewsScraper.
+    """
+    makedirs(path.join(site_dir, "news"), exist_ok=True)
+    links = []
+    for idx, article in enumerate(synthetic_corpus(count, words, seed)):
+        link = f"news/{idx}.html"
+        with open(path.join(site_dir, link), "w", encoding="utf-8") as f:
+            f.write(f"<html><head><title>{article['title']}</title></head>"
+                    f"<body><nav>Menu</nav><article><p>{article['content']}</p></article></body></html>")
+        links.append(f"<div class='news-item'><a href='/{link}'>{article['title']}</a></div>")
+
+    with open(path.join(site_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(f"<html><head><title>Index</title></head><body>{''.join(links)}</body></html>")
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+class FixtureSite:
+    """
+    Serve a directory of recorded (or generated) news pages on a local HTTP port.
+    """
+    def __init__(self, site_dir):
+        self.site_dir = site_dir
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=site_dir))
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/index.html"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+class StubTokenizer:
+    """
+    Whitespace tokenizer with the call and decode surface NewsRedactor uses.
+    """
+    def __call__(self, text, return_tensors=None, truncation=False):
+        return {"input_ids": [text.split()]}
+
+    def decode(self, ids, skip_special_tokens=True):
+        return " ".join(ids)
+
+class StubSummarizer:
+    """
+    Lead-words summarizer standing in for the BART pipeline.
+    """
+    def __call__(self, text, max_length=100, min_length=20, do_sample=False):
+        return [{"summary_text": " ".join(text.split()[:max_length])}]
+
+class StubTranslator:
+    def __call__(self, text, min_length=20, do_sample=False):
+        return [{"translation_text": text}]
+
+def scraping_config(site_url, readability_path, output_dir):
+    return {
+        "logs": "benchmark",
+        "paths": {"output": output_dir, "readability": readability_path},
+        "http_requests": {"headers": {"User-Agent": "newsletter-benchmark"}, "request_timeout": 30000},
+        "sites": [{"name": "fixture", "url": site_url, "news_container": "div.news-item",
+                   "link_tag": "a", "link_attr": "href"}]
+    }
+
+def selection_config(input_dir, output_dir):
+    characters = r"[^a-z0-9áéíóúñü\s]"
+    return {
+        "logs": "benchmark",
+        "paths": {"input": input_dir, "output": output_dir},
+        "score_threshold": 10,
+        "max_news_per_block": 3,
+        "patterns_to_remove": [r"Publicidad\s*", r"Advertisement\s*"],
+        "languages": {
+            "en": {"characters": characters, "stopwords": "english", "content_blocks": CONTENT_BLOCKS},
+            "es": {"characters": characters, "stopwords": "spanish", "content_blocks": CONTENT_BLOCKS}
+        }
+    }
+
+def redaction_config(input_dir, output_dir, summarization_model="stub", translator_model="stub"):
+    return {
+        "logs": "benchmark",
+        "paths": {"input": input_dir, "output": output_dir},
+        "summarization_model": summarization_model,
+        "translator_model": translator_model,
+        "device": "cpu"
+    }
+
+def design_config(input_dir, output_dir, template_path):
+    return {
+        "logs": "benchmark",
+        "paths": {"input": input_dir, "output": output_dir, "template": template_path},
+        "html_parts": {"header": "<header>Boletín</header>", "footer": "<footer>Fin</footer>",
+                       "body_init": "<main>", "body_news": "<section>", "advertisement": "<aside>Anuncio</aside>",
+                       "body_close": "</section></main>"},
+        "sections": {category: category.upper() for category in CONTENT_BLOCKS}
+    }
\ No newline at end of file
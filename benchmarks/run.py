@@ -0,0 +1,196 @@
+from os import path
+from sys import argv, exit
+from json import load, dump
+from time import perf_counter
+from tempfile import TemporaryDirectory
+from argparse import ArgumentParser
+from tracemalloc import start as trace_start, stop as trace_stop, get_traced_memory
+from benchmarks.fixtures import (READABILITY_STUB, FixtureSite, StubTokenizer, StubSummarizer, StubTranslator,
+                                 write_site, synthetic_corpus, synthetic_redacted, scraping_config,
+                                 selection_config, redaction_config, design_config)
+from src.common.logs import configure_logging
+
+BASELINE_PATH = path.join(path.dirname(path.abspath(__file__)), "baselines.json")
+STAGES = ["search", "select", "redact", "design"]
+LOG_PATH = "benchmark"
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def summarize(latencies, elapsed, peak_memory):
+    """
+    Reduce per-item latencies to throughput, latency percentiles and peak memory.
+    """
+    return {
+        "items": len(latencies),
+        "seconds": round(elapsed, 4),
+        "throughput": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "peak_memory_mb": round(peak_memory / 2**20, 2) if peak_memory is not None else None
+    }
+
+def measure(run, memory):
+    """
+    Time every item yielded by run(). With memory enabled, a second pass records the Python heap peak,
+    so tracemalloc overhead does not distort the timings.
+    """
+    latencies = []
+    start = last = perf_counter()
+    for _ in run():
+        now = perf_counter()
+        latencies.append(now - last)
+        last = now
+    elapsed = perf_counter() - start
+
+    peak_memory = None
+    if memory:
+        trace_start()
+        for _ in run():
+            pass
+        _, peak_memory = get_traced_memory()
+        trace_stop()
+    return summarize(latencies, elapsed, peak_memory)
+
+def bench_search(work_dir, args):
+    from src.agent1_search import NewsScraper
+
+    site_dir = path.join(work_dir, "site")
+    if args.fixtures:
+        site_dir = args.fixtures
+    else:
+        write_site(site_dir, args.pages)
+    readability_path = path.join(work_dir, "Readability.js")
+    with open(readability_path, "w", encoding="utf-8") as f:
+        f.write(READABILITY_STUB)
+
+    with FixtureSite(site_dir) as site:
+        scraper = NewsScraper(log_path=LOG_PATH, config=scraping_config(site.url, readability_path, work_dir))
+        return measure(scraper.iter_news, memory=False)
+
+def bench_select(work_dir, args):
+    from src.agent2_select import NewsSelector
+
+    selector = NewsSelector(log_path=LOG_PATH, config=selection_config(work_dir, work_dir))
+    categories = selector.config["languages"]["en"]["content_blocks"]
+    corpus = synthetic_corpus(args.articles, words=args.words)
+
+    def run():
+        for news in corpus:
+            news = selector.clean_item(dict(news))
+            yield selector.score_news(news, categories)
+    return measure(run, memory=args.memory)
+
+def bench_redact(work_dir, args):
+    from src.agent3_redact import NewsRedactor
+
+    config = redaction_config(work_dir, work_dir, args.summarization_model or "stub", args.translator_model or "stub")
+    use_models = bool(args.summarization_model and args.translator_model)
+    redactor = NewsRedactor(log_path=LOG_PATH, config=config, load_models=use_models)
+    if not use_models:
+        redactor.tokenizer, redactor.summarizer, redactor.translator = StubTokenizer(), StubSummarizer(), StubTranslator()
+    corpus = synthetic_corpus(args.redact_articles, words=args.words)
+
+    def run():
+        redactor.summary_cache.clear()
+        for news in corpus:
+            yield redactor.format_news(news)
+    return measure(run, memory=args.memory)
+
+def bench_design(work_dir, args):
+    from src.agent4_design import NewsDesigner
+
+    template_path = path.join(work_dir, "template.html")
+    with open(template_path, "w", encoding="utf-8") as f:
+        f.write("<html><body>{{HEADER}}{{BODY}}{{FOOTER}}</body></html>")
+    designer = NewsDesigner(log_path=LOG_PATH, config=design_config(work_dir, work_dir, template_path))
+    data = synthetic_redacted(articles_per_section=args.section_size)
+
+    def run():
+        for _ in range(args.renders):
+            yield designer.generate_html(data)
+    return measure(run, memory=args.memory)
+
+BENCHMARKS = {"search": bench_search, "select": bench_select, "redact": bench_redact, "design": bench_design}
+
+def compare(results, baseline, threshold):
+    """
+    Flag stages whose throughput dropped or whose p95 latency grew by more than the threshold.
+    """
+    regressions = []
+    for stage, result in results.items():
+        reference = baseline.get(stage)
+        if not reference:
+            continue
+        if reference["throughput"] and result["throughput"] < reference["throughput"] * (1 - threshold):
+            regressions.append(f"{stage}: throughput {result['throughput']} < baseline {reference['throughput']}")
+        if reference["p95_ms"] and result["p95_ms"] > reference["p95_ms"] * (1 + threshold):
+            regressions.append(f"{stage}: p95 {result['p95_ms']} ms > baseline {reference['p95_ms']} ms")
+    return regressions
+
+def print_results(results):
+    print(f"{'stage':<8}{'items':>8}{'items/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak MB':>10}")
+    for stage, result in results.items():
+        memory = "-" if result["peak_memory_mb"] is None else f"{result['peak_memory_mb']:.2f}"
+        print(f"{stage:<8}{result['items']:>8}{result['throughput']:>12.2f}{result['p50_ms']:>10.3f}"
+              f"{result['p95_ms']:>10.3f}{result['p99_ms']:>10.3f}{memory:>10}")
+
+def parse_args(arguments):
+    parser = ArgumentParser(description="Offline benchmarks for the newsletter agents.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--articles", type=int, default=500, help="Synthetic articles for selection.")
+    parser.add_argument("--redact-articles", type=int, default=50, help="Synthetic articles for redaction.")
+    parser.add_argument("--pages", type=int, default=10, help="Generated article pages served to the scraper.")
+    parser.add_argument("--fixtures", help="Directory of recorded pages with an index.html to serve instead.")
+    parser.add_argument("--words", type=int, default=400, help="Words per synthetic article.")
+    parser.add_argument("--renders", type=int, default=200, help="Newsletter renders for design.")
+    parser.add_argument("--section-size", type=int, default=3, help="News per section for design.")
+    parser.add_argument("--summarization-model", help="Local or tiny checkpoint to use instead of the stub.")
+    parser.add_argument("--translator-model", help="Local or tiny checkpoint to use instead of the stub.")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="Skip the memory pass.")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%).")
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    return parser.parse_args(arguments)
+
+def main(arguments):
+    args = parse_args(arguments)
+    configure_logging(level="WARNING")
+
+    results = {}
+    with TemporaryDirectory() as work_dir:
+        for stage in args.stages:
+            results[stage] = BENCHMARKS[stage](work_dir, args)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            dump(results, f, indent=4)
+
+    if args.save_baseline:
+        baseline = {}
+        if path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = load(f)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            dump(baseline, f, indent=4)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not path.exists(args.baseline):
+        print("No baseline to compare against, run with --save-baseline first.")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        regressions = compare(results, load(f), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    exit(main(argv[1:]))
\ No newline at end of file
@@ -1,70 +1,264 @@
+from os import path
+from argparse import ArgumentParser
 from datetime import datetime
 from src.agent0_config import NewsConfigurator
 from src.agent1_search import NewsScraper
 from src.agent2_select import NewsSelector
 from src.agent3_redact import NewsRedactor
 from src.agent4_design import NewsDesigner
+from src.common.deadline import deadline
+from src.common.editions import load_editions, MultiEditionPipeline
+from src.common.jobs import open_queue, jobs_settings
 from src.common.logs import log_message
+from src.common.manifest import RunManifest
+from src.common.path import (get_full_path, SCRP_CONFIG_PATH, SLCT_CONFIG_PATH, RDCT_CONFIG_PATH, DSGN_CONFIG_PATH,
+                             EDITIONS_CONFIG_PATH)
+from src.common.settings import load_stage_settings
+from src.common.queued import QueuedPipeline
+from src.common.streaming import StreamingPipeline
+from src.common.tracing import tracer, profile_stage, export_tracing
 
-def main(): #python -X pycache_prefix=tmp\pycache .\main.py
+# Stage name, title, agent, entry point and configuration file of the file-based pipeline
+PIPELINE_STAGES = [
+    ("search", "Search Content", NewsScraper, "run_scraper", SCRP_CONFIG_PATH),
+    ("select", "Select Content", NewsSelector, "run_selector", SLCT_CONFIG_PATH),
+    ("redact", "Redact Content", NewsRedactor, "run_redactor", RDCT_CONFIG_PATH),
+    ("design", "Design Content", NewsDesigner, "run_designer", DSGN_CONFIG_PATH)
+]
+
+def parse_args():
     """
-    Main pipeline script to orchestrate the newsletter creation process.
+    Parse the command line options of the pipeline.
     """
-    LOG_PATH = str(datetime.now().strftime('%Y-%m-%d'))
+    parser = ArgumentParser(description="Newsletter Automation pipeline.")
+    parser.add_argument("--mode", choices=["files", "streaming", "queue"], default="files",
+                        help="'files' runs the agents one after another through the dated JSON files, "
+                             "'streaming' overlaps Agents 1 to 4 through bounded in-memory queues, "
+                             "'queue' spreads article scraping and summarization over worker processes.")
+    parser.add_argument("--force", action="append", default=[],
+                        choices=[stage[0] for stage in PIPELINE_STAGES] + ["all"],
+                        help="Run a stage even if its inputs and configuration are unchanged. Can be repeated.")
+    parser.add_argument("--stage", action="append", default=[],
+                        choices=[stage[0] for stage in PIPELINE_STAGES] + ["deliver"],
+                        help="Run only this stage from the latest outputs on disk, e.g. '--stage design'. Can be repeated.")
+    parser.add_argument("--editions", nargs="?", const=EDITIONS_CONFIG_PATH,
+                        help="Produce every edition of an editions file in one run, sharing the scrape, "
+                             "the browser and the loaded models (default file: configs/editions_config.json).")
+    return parser.parse_args()
+
+def run_streaming(LOG_PATH, settings):
+    """
+    Run Agents 1 to 4 as an overlapped in-process pipeline.
+    """
+    try:
+        log_message("Running Agents 1-4 in streaming mode...", LOG_PATH)
+        pipeline = StreamingPipeline(
+            NewsScraper(log_path=LOG_PATH),
+            NewsSelector(log_path=LOG_PATH),
+            NewsRedactor(log_path=LOG_PATH),
+            NewsDesigner(log_path=LOG_PATH),
+            log_path=LOG_PATH,
+            article_queue=settings.get("article_queue", 32),
+            redaction_queue=settings.get("redaction_queue", 8)
+        )
+        with tracer.span("stage.streaming"), profile_stage("streaming", LOG_PATH, LOG_PATH):
+            pipeline.run()
+        tracer.sample_memory()
+        log_message("Agents 1-4 completed successfully.", LOG_PATH)
+        return True
+    except Exception as e:
+        log_message(f"Error in streaming pipeline: {e}", LOG_PATH, log_level="ERROR")
+        return False
+
+def run_queue(LOG_PATH):
+    """
+    Run Agents 1 to 4 with scraping and summarization jobs served by worker processes.
+    """
+    try:
+        log_message("Running Agents 1-4 through the job queue...", LOG_PATH)
+        settings = jobs_settings()
+        pipeline = QueuedPipeline(
+            NewsScraper(log_path=LOG_PATH),
+            NewsSelector(log_path=LOG_PATH),
+            # Summaries come from the workers, the models are not needed here
+            NewsRedactor(log_path=LOG_PATH, load_models=False),
+            NewsDesigner(log_path=LOG_PATH),
+            open_queue(settings),
+            log_path=LOG_PATH,
+            settings=settings
+        )
+        with tracer.span("stage.queue"), profile_stage("queue", LOG_PATH, LOG_PATH):
+            pipeline.run()
+        tracer.sample_memory()
+        log_message("Agents 1-4 completed successfully.", LOG_PATH)
+        return True
+    except Exception as e:
+        log_message(f"Error in queued pipeline: {e}", LOG_PATH, log_level="ERROR")
+        return False
+
+def run_editions(LOG_PATH, editions):
+    """
+    Produce and deliver several editions in one run.
+    """
+    try:
+        log_message(f"Running {len(editions)} editions...", LOG_PATH)
+        pipeline = MultiEditionPipeline(editions, LOG_PATH)
+        with tracer.span("stage.editions"), profile_stage("editions", LOG_PATH, LOG_PATH):
+            failed = pipeline.run()
+    except Exception as e:
+        log_message(f"Error in multi-edition run: {e}", LOG_PATH, log_level="ERROR")
+        return
+    if failed:
+        log_message(f"Editions failed: {', '.join(failed)}", LOG_PATH, log_level="ERROR")
+        return
+    log_message("Newsletter Automation Process completed successfully.", LOG_PATH)
+
+def run_files(LOG_PATH, manifest, force=(), only=None):
+    """
+    Run Agents 1 to 4 one after another, handing off through the dated files on disk.
+    Stages whose inputs and configuration are unchanged since their last successful run are skipped.
+    With 'only', just those stages run, always. A failing stage does not stop the later ones when an
+    earlier run today left its output, which they continue from; otherwise the run stops, as the later
+    stages would only rework a previous day's news. A failed redaction is redone from lead-sentence
+    extracts so the designer always has this run's news. Returns whether this run's edition was designed.
+    """
+    for number, (stage, title, agent_class, method, config_path) in enumerate(PIPELINE_STAGES, start=1):
+        if only and stage not in only:
+            continue
+        previous_output = manifest.output(PIPELINE_STAGES[number - 2][0]) if number > 1 else None
+        inputs = [previous_output] if previous_output else []
+        forced = only or stage in force or "all" in force
+        deadline.start_stage(stage)
+        try:
+            if not forced and (number == 1 or inputs) and manifest.is_fresh(stage, config_path, inputs):
+                log_message(f"Skipping Agent {number}: {title}, inputs and configuration unchanged.", LOG_PATH)
+            else:
+                log_message(f"Running Agent {number}: {title}...", LOG_PATH)
+                with tracer.span(f"stage.{stage}"), profile_stage(stage, LOG_PATH, LOG_PATH):
+                    agent = agent_class(log_path=LOG_PATH)
+                    output_file = getattr(agent, method)()
+                tracer.sample_memory()
+                manifest.record(stage, "completed", config_path, inputs, output=output_file)
+                log_message(f"Agent {number} completed successfully.", LOG_PATH)
+        except Exception as e:
+            todays_output = manifest.output(stage)
+            manifest.record(stage, "failed", config_path, inputs, error=e)
+            log_message(f"Error in Agent {number}: {e}", LOG_PATH, log_level="ERROR")
+            if stage == "design":
+                return False
+            if stage == "redact":
+                if not recover_redaction(LOG_PATH, manifest, config_path, inputs):
+                    # The designer would otherwise render a previous day's redaction
+                    return False
+            elif todays_output and path.exists(todays_output):
+                deadline.degrade(stage, "stage failed, later stages continue from the latest outputs on disk",
+                                 LOG_PATH, error=str(e))
+            else:
+                log_message(f"Agent {number} left no output for today, the newsletter is not produced.",
+                            LOG_PATH, log_level="ERROR")
+                return False
 
+    return True
+
+def recover_redaction(LOG_PATH, manifest, config_path, inputs):
+    """
+    Redo a failed redaction without the models, from previous summaries and lead-sentence extracts.
+    Returns whether this run's redaction was written.
+    """
+    deadline.degrade("redact", "redaction failed, redoing it from previous summaries and lead-sentence extracts",
+                     LOG_PATH)
+    try:
+        with tracer.span("stage.redact_fallback"):
+            output_file = NewsRedactor(log_path=LOG_PATH, load_models=False).run_redactor()
+        manifest.record("redact", "degraded", config_path, inputs, output=output_file)
+        return True
+    except Exception as e:
+        log_message(f"Error in degraded redaction: {e}", LOG_PATH, log_level="ERROR")
+        return False
+
+def run_pipeline(args, LOG_PATH):
+    """
+    Run the configuration step, Agents 1 to 4 in the selected mode and the delivery.
+    """
     # 0. Create directories
     try:
         log_message("Running Configuration: Checking Directories...", LOG_PATH)
         config_agent = NewsConfigurator(log_path=LOG_PATH)
         config_agent.run_configurator()
+        settings = config_agent.config.get("streaming", {})
+        manifest = RunManifest(get_full_path(config_agent.config.get("manifests", "data\\manifests")), LOG_PATH)
+
+        # Validate every configuration needed by this run before any work starts
+        deliver = not args.stage or "deliver" in args.stage
+        if args.editions:
+            editions = load_editions(args.editions)
+        else:
+            load_stage_settings(args.stage or [stage[0] for stage in PIPELINE_STAGES])
         log_message("Agent 0 completed successfully.", LOG_PATH)
     except Exception as e:
         log_message(f"Error in Configuration: {e}", LOG_PATH, log_level="ERROR")
         return
+
+    # A full run still produces the newsletter when only the delivery configuration is unusable
+    if not args.stage and not args.editions:
+        try:
+            load_stage_settings(["deliver"])
+        except Exception as e:
+            log_message(f"Error in delivery configuration, the newsletter will not be sent: {e}", LOG_PATH,
+                        log_level="ERROR")
+            deliver = False
     
     log_message("Starting Newsletter Automation Process...", LOG_PATH)
 
-    # 1. Search Content (Agent 1)
-    try:
-        log_message("Running Agent 1: Search Content...", LOG_PATH)
-        search_agent = NewsScraper(log_path=LOG_PATH)
-        search_agent.run_scraper()
-        log_message("Agent 1 completed successfully.", LOG_PATH)
-    except Exception as e:
-        log_message(f"Error in Agent 1: {e}", LOG_PATH, log_level="ERROR")
+    # 1-5. Every edition of the editions file, sharing the scrape and the models
+    if args.editions:
+        run_editions(LOG_PATH, editions)
         return
 
-    # 2. Select Content (Agent 2)
-    try:
-        log_message("Running Agent 2: Select Content...", LOG_PATH)
-        select_agent = NewsSelector(log_path=LOG_PATH)
-        select_agent.run_selector()
-        log_message("Agent 2 completed successfully.", LOG_PATH)
-    except Exception as e:
-        log_message(f"Error in Agent 2: {e}", LOG_PATH, log_level="ERROR")
+    # 1-4. Search, Select, Redact and Design Content
+    if args.stage:
+        completed = run_files(LOG_PATH, manifest, only=args.stage)
+    elif args.mode == "streaming":
+        completed = run_streaming(LOG_PATH, settings)
+    elif args.mode == "queue":
+        completed = run_queue(LOG_PATH)
+    else:
+        completed = run_files(LOG_PATH, manifest, force=args.force)
+    if not completed:
         return
-
-    # 3. Redact Content (Agent 3)
-    try:
-        log_message("Running Agent 3: Redact Content...", LOG_PATH)
-        redact_agent = NewsRedactor(log_path=LOG_PATH)
-        redact_agent.run_redactor()
-        log_message("Agent 3 completed successfully.", LOG_PATH)
-    except Exception as e:
-        log_message(f"Error in Agent 3: {e}", LOG_PATH, log_level="ERROR")
+    if args.stage and not deliver:
+        log_message("Selected stages completed successfully.", LOG_PATH)
+        return
+    if not deliver:
+        log_message("Newsletter designed, delivery skipped.", LOG_PATH, log_level="WARNING")
         return
 
-    # 4. Design Content (Agent 4)
+    # 5. Deliver Content (Agent 5)
     try:
-        log_message("Running Agent 4: Design Content...", LOG_PATH)
-        layout_agent = NewsDesigner(log_path=LOG_PATH)
-        layout_agent.run_designer()
-        log_message("Agent 4 completed successfully.", LOG_PATH)
+        log_message("Running Agent 5: Deliver Content...", LOG_PATH)
+        # Imported here as smtplib and ssl are only needed when delivering
+        from src.agent5_deliver import NewsDeliverer
+        deadline.start_stage("deliver")
+        with tracer.span("stage.deliver"), profile_stage("deliver", LOG_PATH, LOG_PATH):
+            deliver_agent = NewsDeliverer(log_path=LOG_PATH)
+            deliver_agent.run_deliverer()
+        log_message("Agent 5 completed successfully.", LOG_PATH)
     except Exception as e:
-        log_message(f"Error in Agent 4: {e}", LOG_PATH, log_level="ERROR")
+        log_message(f"Error in Agent 5: {e}", LOG_PATH, log_level="ERROR")
         return
 
     log_message("Newsletter Automation Process completed successfully.", LOG_PATH)
 
+def main(): #python -X pycache_prefix=tmp\pycache .\main.py
+    """
+    Main pipeline script to orchestrate the newsletter creation process.
+    """
+    args = parse_args()
+    LOG_PATH = str(datetime.now().strftime('%Y-%m-%d'))
+    try:
+        run_pipeline(args, LOG_PATH)
+    finally:
+        export_tracing(LOG_PATH, LOG_PATH)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,27 +1,57 @@
-from os import path
-from json import load, JSONDecodeError
+from re import fullmatch
+from src.common.logs import LOG_LEVELS, LOG_FORMATS
 from src.common.path import INIT_CONFIG_PATH
+from src.common.settings import load_settings, validate_schema
+
+SCHEMA = {
+    "logs": (str, "a string of file name"),
+    "paths": (list, "a list of strings for paths")
+}
+
+OPTIONAL = {
+    "manifests": (str, "a string of path"),
+    "storage": (dict, "a dict of storage settings"),
+    "tracing": (dict, "a dict of tracing settings"),
+    "streaming": (dict, "a dict of queue sizes"),
+    "jobs": (dict, "a dict of job queue settings"),
+    "deadline": (dict, "a dict of time budget settings")
+}
 
 def load_config(config_path=INIT_CONFIG_PATH):
     """
-    Load and validate the selection configuration JSON file.
+    Load and validate the initialization configuration JSON file, cached until the file changes.
     """
-    if not path.exists(config_path):
-        raise FileNotFoundError(f"Configuration file not found: {config_path}")
-
-    with open(config_path, "r", encoding="utf-8") as file:
-        try:
-            config = load(file)
-            validate_config(config)
-            return config
-        except JSONDecodeError as e:
-            raise ValueError(f"Error decoding JSON configuration: {e}")
+    return load_settings(config_path, validate_config)
 
 def validate_config(config):
     """
-    Validate the structure of the scraping configuration file.
+    Validate the structure of the initialization configuration file.
     """
-    if "logs" not in config or not isinstance(config["logs"], str):
-        raise ValueError("Invalid configuration: 'logs' must be a string of file name.")
-    if "paths" not in config or not isinstance(config["paths"], list):
-        raise ValueError("Invalid configuration: 'paths' must be a list of strings for paths.")
\ No newline at end of file
+    validate_schema(config, SCHEMA, OPTIONAL)
+    if "log_level" in config and config["log_level"] not in LOG_LEVELS:
+        raise ValueError(f"Invalid configuration: 'log_level' must be one of {list(LOG_LEVELS)}.")
+    if "log_format" in config and config["log_format"] not in LOG_FORMATS:
+        raise ValueError(f"Invalid configuration: 'log_format' must be one of {list(LOG_FORMATS)}.")
+    if config.get("storage", {}).get("format", "json") not in ("json", "records"):
+        raise ValueError("Invalid configuration: 'storage.format' must be 'json' or 'records'.")
+    if config.get("storage", {}).get("codec") not in (None, "zstd", "zlib", "none"):
+        raise ValueError("Invalid configuration: 'storage.codec' must be 'zstd', 'zlib' or 'none'.")
+    if config.get("jobs", {}).get("journal_mode", "wal") not in ("wal", "delete", "truncate"):
+        raise ValueError("Invalid configuration: 'jobs.journal_mode' must be 'wal', 'delete' or 'truncate'.")
+    max_attempts = config.get("jobs", {}).get("max_attempts", 3)
+    if not isinstance(max_attempts, int) or max_attempts < 1:
+        raise ValueError("Invalid configuration: 'jobs.max_attempts' must be a positive int.")
+    deadline = config.get("deadline", {})
+    if deadline.get("budget_minutes") is not None and not isinstance(deadline["budget_minutes"], (int, float)):
+        raise ValueError("Invalid configuration: 'deadline.budget_minutes' must be a number of minutes.")
+    finish_by = deadline.get("finish_by")
+    if finish_by and (not isinstance(finish_by, str) or not fullmatch(r"([01]?\d|2[0-3]):[0-5]\d", finish_by)):
+        raise ValueError("Invalid configuration: 'deadline.finish_by' must be a time as 'HH:MM'.")
+    if not isinstance(deadline.get("shares", {}), dict):
+        raise ValueError("Invalid configuration: 'deadline.shares' must be a dict of shares by stage.")
+    for stage, share in deadline.get("shares", {}).items():
+        if not isinstance(share, (int, float)) or share <= 0:
+            raise ValueError(f"Invalid deadline share for stage {stage}: {share}")
+    for stage, profiler in config.get("tracing", {}).get("profile", {}).items():
+        if profiler not in ("cprofile", "pyinstrument"):
+            raise ValueError(f"Invalid profiler for stage {stage}: {profiler}")
\ No newline at end of file
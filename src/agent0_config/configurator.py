@@ -1,7 +1,9 @@
 from os import makedirs, path
 from src.agent0_config.config import load_config
-from src.common.logs import log_message
+from src.common.deadline import configure_deadline
+from src.common.logs import log_message, configure_logging
 from src.common.path import get_full_path
+from src.common.tracing import configure_tracing
 
 class NewsConfigurator:
     def __init__(self, log_path=None):
@@ -10,6 +12,15 @@ class NewsConfigurator:
             self.logs = log_path
         else:
             self.logs = self.config["logs"]
+        configure_logging(level=self.config.get("log_level", "INFO"),
+                          log_format=self.config.get("log_format", "text"))
+        tracing = self.config.get("tracing", {})
+        configure_tracing(enabled=tracing.get("enabled", False),
+                          output=get_full_path(tracing.get("output", "data\\metrics")),
+                          profile=tracing.get("profile", {}))
+        deadline = self.config.get("deadline", {})
+        configure_deadline(self.logs, budget_minutes=deadline.get("budget_minutes"),
+                           finish_by=deadline.get("finish_by"), shares=deadline.get("shares"))
 
     def create_dirs(self):
         """
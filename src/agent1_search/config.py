@@ -1,39 +1,42 @@
-from os import path
-from json import load, JSONDecodeError
+from src.agent1_search.discovery import DISCOVERY_MODES
 from src.common.path import SCRP_CONFIG_PATH
+from src.common.settings import load_settings, validate_schema
+
+SCHEMA = {
+    "logs": (str, "a string of file name"),
+    "paths": (dict, "a dict of strings for paths"),
+    "http_requests": (dict, "a dict of connection definitions"),
+    "sites": (list, "a list of site definitions")
+}
+
+OPTIONAL = {
+    "discovery": (dict, "a dict of feed and sitemap discovery settings")
+}
 
 def load_config(config_path=SCRP_CONFIG_PATH):
     """
-    Load and validate the selection configuration JSON file.
+    Load and validate the scraping configuration JSON file, cached until the file changes.
     """
-    if not path.exists(config_path):
-        raise FileNotFoundError(f"Configuration file not found: {config_path}")
-
-    with open(config_path, "r", encoding="utf-8") as file:
-        try:
-            config = load(file)
-            validate_config(config)
-            return config
-        except JSONDecodeError as e:
-            raise ValueError(f"Error decoding JSON configuration: {e}")
+    return load_settings(config_path, validate_config)
 
 def validate_config(config):
     """
     Validate the structure of the scraping configuration file.
     """
-    if "logs" not in config or not isinstance(config["logs"], str):
-        raise ValueError("Invalid configuration: 'logs' must be a string of file name.")
-    if "paths" not in config or not isinstance(config["paths"], dict):
-        raise ValueError("Invalid configuration: 'paths' must be a dict of strings for paths.")
-    if "http_requests" not in config or not isinstance(config["http_requests"], dict):
-        raise ValueError("Invalid configuration: 'http_requests' must be a dict of connection definitions.")
-    if "sites" not in config or not isinstance(config["sites"], list):
-        raise ValueError("Invalid configuration: 'sites' must be a list of site definitions.")
+    validate_schema(config, SCHEMA, OPTIONAL)
     for site in config["sites"]:
         name = "name" not in site
         url = "url" not in site
-        news_container = "news_container" not in site
-        link_tag = "link_tag" not in site
-        link_attr = "link_attr" not in site
+        discovery = site.get("discovery", "index")
+        if discovery not in DISCOVERY_MODES:
+            raise ValueError(f"Invalid discovery mode for {site.get('name')}: must be one of {list(DISCOVERY_MODES)}.")
+
+        # Feeds and sitemaps list the articles themselves, only index pages need selectors
+        if discovery == "index":
+            news_container = "news_container" not in site
+            link_tag = "link_tag" not in site
+            link_attr = "link_attr" not in site
+        else:
+            news_container = link_tag = link_attr = False
         if name or url or news_container or link_tag or link_attr:
             raise ValueError(f"Invalid site definition: {site}")
\ No newline at end of file
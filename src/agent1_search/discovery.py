@@ -0,0 +1,155 @@
+from os import makedirs, path, replace
+from json import load, dump, JSONDecodeError
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from xml.etree.ElementTree import iterparse, ParseError
+
+# Discovery modes of a site: index page selectors, RSS/Atom feed, or (news) sitemap
+DISCOVERY_MODES = ("index", "feed", "sitemap")
+
+# Full-text and summary tags of RSS 2.0 (content:encoded, description), RSS 1.0 and Atom. Matched
+# with their namespace, so extensions such as <media:content> or <media:description> are ignored
+ATOM = "{http://www.w3.org/2005/Atom}"
+RSS1 = "{http://purl.org/rss/1.0/}"
+CONTENT_TAGS = ("{http://purl.org/rss/1.0/modules/content/}encoded", f"{ATOM}content", "content")
+SUMMARY_TAGS = ("description", f"{RSS1}description", f"{ATOM}summary", "summary")
+
+def local_name(tag):
+    """
+    Strip the namespace of an XML tag, '{http://www.w3.org/2005/Atom}entry' -> 'entry'.
+    """
+    return tag.rsplit("}", 1)[-1]
+
+def parse_date(text):
+    """
+    Parse an RFC 822 (RSS) or ISO 8601 (Atom, sitemaps) date into an aware UTC datetime, or None.
+    """
+    if not text:
+        return None
+    text = text.strip()
+    try:
+        date = parsedate_to_datetime(text)
+    except (TypeError, ValueError, IndexError):
+        try:
+            date = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.astimezone(timezone.utc)
+
+def entry_fields(element):
+    """
+    Read the link, title, date and content of an RSS item, Atom entry or sitemap url element.
+    """
+    entry = {"link": None, "title": None, "published": None, "content": None}
+    summary = None
+    for child in element.iter():
+        if child is element:
+            continue
+        name = local_name(child.tag)
+        text = (child.text or "").strip()
+        if name == "link":
+            # Atom links are attributes, only the alternate one points to the article
+            if child.get("href") and child.get("rel", "alternate") == "alternate":
+                entry["link"] = child.get("href")
+            elif text and not entry["link"]:
+                entry["link"] = text
+        elif name == "loc" and not entry["link"]:
+            entry["link"] = text
+        elif name == "title" and entry["title"] is None:
+            entry["title"] = text
+        elif name in ("pubDate", "published", "publication_date", "date"):
+            entry["published"] = parse_date(text) or entry["published"]
+        elif name in ("updated", "lastmod") and entry["published"] is None:
+            entry["published"] = parse_date(text)
+        elif child.tag in CONTENT_TAGS:
+            entry["content"] = entry["content"] or text or None
+        elif child.tag in SUMMARY_TAGS:
+            summary = summary or text or None
+    entry["content"] = entry["content"] or summary
+    return entry
+
+def iter_feed(stream):
+    """
+    Stream the entries of an RSS, Atom or sitemap document without building its whole tree.
+    Sitemap indexes yield their child sitemaps with 'sitemap' set to True.
+    """
+    try:
+        for event, element in iterparse(stream, events=("end",)):
+            name = local_name(element.tag)
+            if name in ("item", "entry", "url", "sitemap"):
+                entry = entry_fields(element)
+                entry["sitemap"] = name == "sitemap"
+                element.clear()
+                if entry["link"]:
+                    yield entry
+    except ParseError as e:
+        raise ValueError(f"Invalid feed document: {e}")
+
+def html_to_text(html):
+    """
+    Reduce the HTML content of a feed entry to plain text, as Readability's textContent does.
+    """
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html, "html.parser").get_text(" ", strip=True)
+
+class DiscoveryState:
+    """
+    Discovery window of each site, so feeds and sitemaps only return new articles. Every run of a day
+    starts from the last discovery of a previous day, as a rerun rewrites that day's scraped output.
+    New discoveries are kept in memory until save(), once the scraped news are written.
+    """
+    def __init__(self, state_path):
+        self.state_path = state_path
+        self.sites = {}
+        self.pending = {}
+        if path.exists(state_path):
+            try:
+                with open(state_path, "r", encoding="utf-8") as f:
+                    self.sites = load(f)
+            except (JSONDecodeError, OSError):
+                # A corrupt state only means the lookback window is used again
+                self.sites = {}
+
+    def since(self, site_name, run_time):
+        """
+        Return the start of a site's discovery window for a run, or None if it was never discovered.
+        """
+        entry = self.sites.get(site_name)
+        if isinstance(entry, str):
+            # State files written before the window start was kept
+            entry = {"time": entry, "since": entry}
+        if not entry:
+            return None
+        last = parse_date(entry.get("time"))
+        if last is not None and last.astimezone().date() == run_time.astimezone().date():
+            return parse_date(entry.get("since"))
+        return last
+
+    def mark(self, site_name, since, run_time):
+        """
+        Record a finished discovery of a site, written by the next save().
+        """
+        self.pending[site_name] = {"time": run_time.isoformat(), "since": since.isoformat() if since else None}
+
+    def discard(self, site_name):
+        """
+        Drop the unsaved discovery of a site whose articles were not all scraped, so they are found again.
+        """
+        self.pending.pop(site_name, None)
+
+    def save(self):
+        """
+        Write the pending discoveries. The state file is rewritten atomically.
+        """
+        if not self.pending:
+            return
+        self.sites.update(self.pending)
+        self.pending = {}
+        makedirs(path.dirname(self.state_path), exist_ok=True)
+        tmp_file = f"{self.state_path}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            dump(self.sites, f, indent=4)
+        replace(tmp_file, self.state_path)
@@ -1,17 +1,21 @@
-from json import dump
-from os import path
-from datetime import datetime
-from bs4 import BeautifulSoup
-from requests import get as request_get
+from typing import TYPE_CHECKING
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from urllib.parse import urljoin
-from playwright.sync_api import sync_playwright, Playwright
 from src.agent1_search.config import load_config
+from src.agent1_search.discovery import DiscoveryState, iter_feed, html_to_text
+from src.common.deadline import deadline
 from src.common.logs import log_message
 from src.common.path import get_full_path
+from src.common.storage import save_stage_output
+from src.common.tracing import tracer
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Playwright
 
 class NewsScraper:
-    def __init__(self, log_path=None):
-        self.config = load_config()
+    def __init__(self, log_path=None, config=None):
+        self.config = config or load_config()
         self.RAW_DATA_DIR = get_full_path(self.config["paths"]["output"])
         self.READABLE_PATH = get_full_path(self.config["paths"]["readability"])
 
@@ -20,49 +24,107 @@ class NewsScraper:
         else:
             self.logs = self.config["logs"]
 
-    def scrape_news(self, url, playwright: Playwright):
+        # Browser shared by the articles of a session, and the Readability.js source
+        self.browser = None
+        self.readability_js = None
+
+        # Feed and sitemap discovery settings, and the last discovery time of each site
+        self.discovery = {"state": "data\\raw\\discovery_state.json", "lookback_hours": 48,
+                          "full_text_min_chars": 1000, "max_sitemaps": 20}
+        self.discovery.update(self.config.get("discovery", {}))
+        self.state = None
+
+    @contextmanager
+    def browser_session(self):
         """
-        Fetches the title and body of an individual news article by visiting its URL.
-        Uses Readability.js to parse the content and extract both title and textContent.
+        Start Playwright and a single Chromium browser reused by every article until the session ends.
+        If the browser cannot be started, articles fall back to launching their own.
         """
+        from playwright.sync_api import sync_playwright
+
+        playwright = None
         try:
-            # Load Readability.js
-            with open(self.READABLE_PATH, "r", encoding="utf-8") as f:
-                readability_js = f.read()
+            playwright = sync_playwright().start()
+            with tracer.span("search.browser_launch"):
+                self.browser = playwright.chromium.launch()
+        except Exception as e:
+            log_message(f"Error: Could not start a shared browser: {e}", self.logs, log_level="WARNING", stage="search")
+            if playwright is not None:
+                playwright.stop()
+            yield None
+            return
 
-        except Exception:
-            log_message(f"Error: Readability.js is not imported", self.logs, log_level="ERROR")
-            raise ImportError
+        try:
+            yield self.browser
+        finally:
+            self.browser.close()
+            self.browser = None
+            playwright.stop()
+
+    def load_readability(self):
+        """
+        Read Readability.js once per scraper.
+        """
+        if self.readability_js is None:
+            try:
+                # Load Readability.js
+                with open(self.READABLE_PATH, "r", encoding="utf-8") as f:
+                    self.readability_js = f.read()
+
+            except Exception:
+                log_message(f"Error: Readability.js is not imported", self.logs, log_level="ERROR")
+                raise ImportError
+        return self.readability_js
+
+    def scrape_news(self, url, playwright: "Playwright" = None):
+        """
+        Fetches the title and body of an individual news article by visiting its URL.
+        Uses Readability.js to parse the content and extract both title and textContent.
+        The shared browser of the session is used when there is one.
+        """
+        readability_js = self.load_readability()
         
         try:
             
             # Open page
-            chromium = playwright.chromium
-            browser = chromium.launch()
-            page = browser.new_page()
-            REQUEST_TIMEOUT = self.config["http_requests"]["request_timeout"]
-            page.goto(url, timeout=REQUEST_TIMEOUT)
-
-            # Inject Readability.js
-            page.evaluate(readability_js)
-
-            # Use Readability.js to extract article details
-            article = page.evaluate("""
-                () => {
-                        const reader = new Readability(document);
-                        const parsed = reader.parse();
-                        if (parsed) {
-                            return {
-                                title: parsed.title || "No title available",
-                                textContent: parsed.textContent || "No content available"
-                            };
-                        }
-                        return null;
-                        }
-                    """)
-
-            # Close the browser
-            browser.close()
+            browser = self.browser
+            if browser is None:
+                with tracer.span("search.browser_launch"):
+                    browser = playwright.chromium.launch()
+            page = None
+            try:
+                page = browser.new_page()
+                # A slow page cannot hold the search stage past its budget
+                REQUEST_TIMEOUT = min(self.config["http_requests"]["request_timeout"],
+                                      max(1000, deadline.stage_remaining("search") * 1000))
+                with tracer.span("search.goto", article=url):
+                    page.goto(url, timeout=REQUEST_TIMEOUT)
+
+                # Inject Readability.js
+                with tracer.span("search.readability", article=url):
+                    page.evaluate(readability_js)
+
+                    # Use Readability.js to extract article details
+                    article = page.evaluate("""
+                        () => {
+                                const reader = new Readability(document);
+                                const parsed = reader.parse();
+                                if (parsed) {
+                                    return {
+                                        title: parsed.title || "No title available",
+                                        textContent: parsed.textContent || "No content available"
+                                    };
+                                }
+                                return null;
+                                }
+                        """)
+
+            finally:
+                # Close the page, and the browser unless it is shared
+                if page is not None:
+                    page.close()
+                if browser is not self.browser:
+                    browser.close()
 
             # Return the extracted article details or fallback message
             if article:
@@ -70,84 +132,219 @@ class NewsScraper:
             return "No title available","No content available"
 
         except Exception as e:
-            log_message(f"Error: Could not fetch content from {url}: {e}", self.logs, log_level="WARNING")
+            log_message(f"Error: Could not fetch content from {url}: {e}", self.logs, log_level="WARNING",
+                        stage="search", article=url)
             return "Error fetching title", "Error fetching content"
         
-    def scrape_site(self, site):
+    def iter_site_links(self, site):
         """
-        Scrapes a single site based on the configuration, including the content of each news article.
+        Yield the absolute links of the news listed on a site's index page, without duplicates.
         """
-        try:
-            HEADERS = self.config["http_requests"]["headers"]
-            REQUEST_TIMEOUT = self.config["http_requests"]["request_timeout"]
+        # Heavy dependencies are imported on first use to keep startup fast
+        from bs4 import BeautifulSoup
+        from requests import get as request_get
+
+        HEADERS = self.config["http_requests"]["headers"]
+        REQUEST_TIMEOUT = self.config["http_requests"]["request_timeout"]
+        with tracer.span("search.index", site=site["name"]):
             response = request_get(site["url"], headers=HEADERS, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
             soup = BeautifulSoup(response.text, "html.parser")
+        tracer.count("bytes", len(response.content), stage="search")
+
+        # Find the containers with news
+        containers = soup.select(site["news_container"])
+        if not containers:
+            log_message(f"Error: Could not find containers for {site['name']}", self.logs, log_level="ERROR",
+                        stage="search", site=site["name"])
+            return
+
+        processed_links = set()
+        base_url = site["url"]
+
+        for container in containers:
+            # Extract news items
+            link = container.find(site["link_tag"])
+            if link:
+                # Get the link and resolve relative URLs
+                news_link = link.get(site["link_attr"])
+                if not news_link:
+                    continue
+                news_link = urljoin(base_url, news_link)
 
-            # Find the containers with news
-            containers = soup.select(site["news_container"])
-            if not containers:
-                log_message(f"Error: Could not find containers for {site['name']}", self.logs, log_level="ERROR")
-                return []
-
-            scraped_news = []
-            processed_links = set()
-            base_url = site["url"]
-
-            for container in containers:
-                # Extract news items
-                link = container.find(site["link_tag"])
-                if link:
-                    # Get the link and resolve relative URLs
-                    news_link = link.get(site["link_attr"])
-                    if not news_link:
-                        continue
-                    news_link = urljoin(base_url, news_link)
-
-                    # Skip duplicates
-                    if news_link in processed_links:
-                        continue
-                    processed_links.add(news_link)
-
-                    with sync_playwright() as playwright:
-                        news_title, news_content = self.scrape_news(news_link, playwright)
-
-                    news_data = {
-                        "title": news_title,
-                        "link": news_link,
-                        "content": news_content,
-                        "source": site["name"],
-                        "date": datetime.now().strftime("%Y-%m-%d")
-                    }
-                    scraped_news.append(news_data)
-
-            return scraped_news
+                # Skip duplicates
+                if news_link in processed_links:
+                    continue
+                processed_links.add(news_link)
+                yield news_link
+
+    def fetch_news(self, site_name, news_link):
+        """
+        Fetch one news article and return it as a scraped news item.
+        """
+        from playwright.sync_api import sync_playwright
+
+        with tracer.span("search.article", site=site_name, article=news_link):
+            if self.browser is not None:
+                news_title, news_content = self.scrape_news(news_link)
+            else:
+                with sync_playwright() as playwright:
+                    news_title, news_content = self.scrape_news(news_link, playwright)
+        tracer.count("articles", stage="search")
+        tracer.count("bytes", len(news_content.encode("utf-8")), stage="search")
+
+        return {
+            "title": news_title,
+            "link": news_link,
+            "content": news_content,
+            "source": site_name,
+            "date": datetime.now().strftime("%Y-%m-%d")
+        }
+
+    def iter_feed_entries(self, site, since):
+        """
+        Stream the entries of a site's RSS/Atom feed or sitemap published after 'since'.
+        Sitemap indexes are followed into their child sitemaps.
+        """
+        from requests import get as request_get
+
+        HEADERS = self.config["http_requests"]["headers"]
+        REQUEST_TIMEOUT = self.config["http_requests"]["request_timeout"]
+        pending = [site.get("feed_url", site["url"])]
+        fetched = 0
+        while pending and fetched < self.discovery["max_sitemaps"]:
+            feed_url = pending.pop(0)
+            fetched += 1
+            with tracer.span("search.feed", site=site["name"]):
+                with request_get(feed_url, headers=HEADERS, timeout=REQUEST_TIMEOUT, stream=True) as response:
+                    response.raise_for_status()
+                    response.raw.decode_content = True
+                    for entry in iter_feed(response.raw):
+                        if entry["published"] is not None and since is not None and entry["published"] <= since:
+                            continue
+                        entry["link"] = urljoin(feed_url, entry["link"])
+                        if entry["sitemap"]:
+                            pending.append(entry["link"])
+                        else:
+                            yield entry
+                    tracer.count("bytes", response.raw.tell(), stage="search")
+
+    def discover(self, site):
+        """
+        Yield the articles of a site as {"link", "title", "content"}, where title and content are only
+        known for feed entries. Feed and sitemap sites only return articles published since the last
+        discovery, which is recorded once every article of the site has been consumed and saved with
+        the scraped news.
+        """
+        mode = site.get("discovery", "index")
+        if mode == "index":
+            for news_link in self.iter_site_links(site):
+                yield {"link": news_link, "title": None, "content": None}
+            return
+
+        if self.state is None:
+            self.state = DiscoveryState(get_full_path(self.discovery["state"]))
+        run_time = datetime.now(timezone.utc)
+        since = (self.state.since(site["name"], run_time)
+                 or run_time - timedelta(hours=self.discovery["lookback_hours"]))
+
+        processed_links = set()
+        for entry in self.iter_feed_entries(site, since):
+            if entry["link"] in processed_links:
+                continue
+            processed_links.add(entry["link"])
+            yield entry
+        log_message(f"Discovered {len(processed_links)} new articles in the {mode} of {site['name']}", self.logs,
+                    stage="search", site=site["name"])
+        self.state.mark(site["name"], since, run_time)
+
+    def feed_news(self, site_name, entry):
+        """
+        Build a scraped news item from a feed entry that already carries the full text, without rendering the page.
+        Returns None if the entry only has a teaser.
+        """
+        if not entry["content"]:
+            return None
+        content = html_to_text(entry["content"])
+        if len(content) < self.discovery["full_text_min_chars"]:
+            return None
+        tracer.count("articles", stage="search")
+        tracer.count("feed_articles", stage="search")
+        return {
+            "title": entry["title"] or "No title available",
+            "link": entry["link"],
+            "content": content,
+            "source": site_name,
+            "date": datetime.now().strftime("%Y-%m-%d")
+        }
+
+    def iter_site_news(self, site):
+        """
+        Scrapes a single site based on the configuration, yielding each news article as soon as its content is fetched.
+        """
+        try:
+            count = 0
+            for entry in self.discover(site):
+                if deadline.expired("search"):
+                    deadline.degrade("search", f"stopped discovering {site['name']} after {count} articles, "
+                                     "the search budget is spent", self.logs, site=site["name"])
+                    return
+                yield self.feed_news(site["name"], entry) or self.fetch_news(site["name"], entry["link"])
+                count += 1
 
         except Exception as e:
-            log_message(f"Error: Could not scrape {site['name']}: {e}", self.logs, log_level="ERROR")
-            return []
+            log_message(f"Error: Could not scrape {site['name']}: {e}", self.logs, log_level="ERROR",
+                        stage="search", site=site["name"])
+
+    def scrape_site(self, site):
+        """
+        Scrapes a single site based on the configuration, including the content of each news article.
+        """
+        return list(self.iter_site_news(site))
+
+    def iter_news(self):
+        """
+        Yield the news of every configured site as they are scraped.
+        """
+        with self.browser_session():
+            for idx, site in enumerate(self.config["sites"]):
+                if self.out_of_budget(self.config["sites"][idx:]):
+                    break
+                log_message(f"Scraping {site['name']}...", self.logs, stage="search", site=site["name"])
+                yield from self.iter_site_news(site)
         
+    def out_of_budget(self, remaining_sites):
+        """
+        Check whether the search budget is spent, recording the sites that will not be visited.
+        """
+        if not deadline.expired("search"):
+            return False
+        names = ", ".join(site["name"] for site in remaining_sites)
+        deadline.degrade("search", f"skipped {len(remaining_sites)} sites, the search budget is spent", self.logs,
+                         sites=names)
+        return True
+
     def save_scraped_news(self, all_sites):
         """
-        Save the scraped news into a processed JSON file.
+        Save the scraped news into a raw data file.
         """
-        # Save the scraped news to a JSON file
-        output_file = path.join(self.RAW_DATA_DIR, f"scraped_news_{datetime.now().strftime('%Y%m%d')}.json")
-        with open(output_file, "w", encoding="utf-8") as f:
-            dump(all_sites, f, indent=4, ensure_ascii=False)
+        # Save the scraped news in the configured inter-stage format
+        output_file = save_stage_output("search", all_sites, self.RAW_DATA_DIR, "scraped_news")
+        # Sites are only marked as discovered once their articles are on disk
+        if self.state is not None:
+            self.state.save()
 
         log_message(f"Scraped news saved to {output_file}", self.logs)
+        return output_file
 
     def run_scraper(self):
         """
         Main method to scrape all sites and save the results.
         """
-        all_news = []
-        for site in self.config["sites"]:
-            log_message(f"Scraping {site['name']}...", self.logs)
-            all_news.extend(self.scrape_site(site))
+        all_news = list(self.iter_news())
 
         log_message("Saving scraped news...", self.logs)
-        self.save_scraped_news(all_news)
+        output_file = self.save_scraped_news(all_news)
 
-        log_message("Newsletter scraping complete.", self.logs)
\ No newline at end of file
+        log_message("Newsletter scraping complete.", self.logs)
+        return output_file
\ No newline at end of file
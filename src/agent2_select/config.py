@@ -1,38 +1,30 @@
-from os import path
-from json import load, JSONDecodeError
 from src.common.path import SLCT_CONFIG_PATH
+from src.common.settings import load_settings, validate_schema
+
+SCHEMA = {
+    "logs": (str, "a string of file name"),
+    "paths": (dict, "a dict of strings for paths"),
+    "score_threshold": (int, "an int"),
+    "max_news_per_block": (int, "an int"),
+    "patterns_to_remove": (list, "a list of removal patterns"),
+    "languages": (dict, "a dict of languages definitions")
+}
+
+OPTIONAL = {
+    "matching": (dict, "a dict of keyword matching options")
+}
 
 def load_config(config_path=SLCT_CONFIG_PATH):
     """
-    Load and validate the selection configuration JSON file.
+    Load and validate the selection configuration JSON file, cached until the file changes.
     """
-    if not path.exists(config_path):
-        raise FileNotFoundError(f"Configuration file not found: {config_path}")
-
-    with open(config_path, "r", encoding="utf-8") as file:
-        try:
-            config = load(file)
-            validate_config(config)
-            return config
-        except JSONDecodeError as e:
-            raise ValueError(f"Error decoding JSON configuration: {e}")
+    return load_settings(config_path, validate_config)
 
 def validate_config(config):
     """
     Validate the structure of the selection configuration file.
     """
-    if "logs" not in config or not isinstance(config["logs"], str):
-        raise ValueError("Invalid configuration: 'logs' must be a string of file name.")
-    if "paths" not in config or not isinstance(config["paths"], dict):
-        raise ValueError("Invalid configuration: 'paths' must be a dict of strings for paths.")
-    if "score_threshold" not in config or not isinstance(config["score_threshold"], int):
-        raise ValueError("Invalid configuration: 'score_threshold' must be an int.")
-    if "max_news_per_block" not in config or not isinstance(config["max_news_per_block"], int):
-        raise ValueError("Invalid configuration: 'max_news_per_block' must be an int.")
-    if "patterns_to_remove" not in config or not isinstance(config["patterns_to_remove"], list):
-        raise ValueError("Invalid configuration: 'patterns_to_remove' must be a list of removal patterns.")
-    if "languages" not in config or not isinstance(config["languages"], dict):
-        raise ValueError("Invalid configuration: 'languages' must be a dict of languages definitions.")
+    validate_schema(config, SCHEMA, OPTIONAL)
     for lang in config["languages"]:
         parameters = config["languages"][lang]
         characters = "characters" not in parameters
@@ -0,0 +1,113 @@
+from re import sub
+from collections import deque
+from unicodedata import normalize as unicode_normalize, combining
+
+# Separator between the title and the content, no keyword can match across it
+SEPARATOR = " | "
+
+def fold_accents(text):
+    """
+    Remove diacritics, 'economía' -> 'economia'. The 'ñ' is kept apart from 'n'.
+    """
+    text = text.replace("ñ", "\0")
+    folded = "".join(char for char in unicode_normalize("NFKD", text) if not combining(char))
+    return folded.replace("\0", "ñ")
+
+def normalize_text(text, characters=r"[^\w\s]", accents=True):
+    """
+    Lowercase a text, replace the characters matched by the 'characters' pattern with spaces,
+    optionally fold accents, and collapse whitespace so words are separated by single spaces.
+    """
+    text = text.lower()
+    if characters:
+        text = sub(characters, " ", text)
+    if accents:
+        text = fold_accents(text)
+    return " ".join(text.split())
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over the keywords of every category. A normalized text is scanned once,
+    whatever the number of keywords, and multi-word keywords match as phrases. Matches must start and
+    end on word boundaries, except prefix keywords ('econom*', or single words stemmed with a stemmer)
+    which match any word they begin.
+    """
+    def __init__(self, content_blocks, normalize=normalize_text, stemmer=None, min_stem_length=4):
+        self.content_blocks = content_blocks
+        self.normalize = normalize
+
+        # Trie of the patterns: transitions, failure links and outputs per state
+        self.transitions = [{}]
+        self.failure = [0]
+        self.outputs = [[]]
+
+        for category, keywords in content_blocks.items():
+            for keyword in keywords:
+                prefix = keyword.endswith("*")
+                pattern = self.normalize(keyword.rstrip("*"))
+                if not pattern:
+                    continue
+                if stemmer is not None and not prefix and " " not in pattern and len(pattern) >= min_stem_length:
+                    # Match every inflection of the word through its stem
+                    pattern, prefix = self.normalize(stemmer.stem(pattern)), True
+                self.add(pattern, (category, keyword, len(pattern), prefix))
+        self.build()
+
+    def add(self, pattern, output):
+        state = 0
+        for char in pattern:
+            next_state = self.transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions[state][char] = next_state
+                self.transitions.append({})
+                self.failure.append(0)
+                self.outputs.append([])
+            state = next_state
+        self.outputs[state].append(output)
+
+    def build(self):
+        """
+        Compute the failure links breadth first, merging the outputs of each state's failure state.
+        """
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = self.failure[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.failure[fallback]
+                self.failure[next_state] = self.transitions[fallback].get(char, 0)
+                if self.failure[next_state] == next_state:
+                    self.failure[next_state] = 0
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.failure[next_state]]
+
+    def scan(self, text):
+        """
+        Yield (category, keyword) for every keyword occurrence in an already normalized text.
+        """
+        transitions, failure, outputs = self.transitions, self.failure, self.outputs
+        state = 0
+        last = len(text) - 1
+        for end, char in enumerate(text):
+            while state and char not in transitions[state]:
+                state = failure[state]
+            state = transitions[state].get(char, 0)
+            for category, keyword, length, prefix in outputs[state]:
+                start = end - length + 1
+                if start > 0 and text[start - 1] != " ":
+                    continue
+                if not prefix and end < last and text[end + 1] != " ":
+                    continue
+                yield category, keyword
+
+    def match(self, *texts):
+        """
+        Return the distinct keywords found in the texts, by category.
+        """
+        text = SEPARATOR.join(self.normalize(text) for text in texts)
+        matches = {category: set() for category in self.content_blocks}
+        for category, keyword in self.scan(text):
+            matches[category].add(keyword)
+        return matches
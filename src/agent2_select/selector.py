@@ -1,17 +1,14 @@
-from json import load, dump
-from os import path, listdir
-from datetime import datetime
 from re import sub
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from langdetect import detect as lang_detector
 from src.agent2_select.config import load_config
+from src.agent2_select.matcher import KeywordMatcher, normalize_text
 from src.common.logs import log_message
 from src.common.path import get_full_path
+from src.common.storage import load_stage_output, save_stage_output
+from src.common.tracing import tracer
 
 class NewsSelector:
-    def __init__(self, log_path=None):
-        self.config = load_config()
+    def __init__(self, log_path=None, config=None):
+        self.config = config or load_config()
         self.RAW_DATA_DIR = get_full_path(self.config["paths"]["input"])
         self.PRCS_DATA_DIR = get_full_path(self.config["paths"]["output"])
 
@@ -20,19 +17,19 @@ class NewsSelector:
         else:
             self.logs = self.config["logs"]
 
+        # Keyword automatons per language, built once
+        self.matchers = {}
+
     def load_scraped_data(self):
         """
         Load the most recent scraped news data from the raw data folder.
         """
-        files = [f for f in listdir(self.RAW_DATA_DIR) if f.endswith(".json")]
-        if not files:
+        # Load the latest file registered in the run catalog
+        data, _ = load_stage_output("search", self.RAW_DATA_DIR)
+        if data is None:
             log_message(f"Error: No scraped data files found in {self.RAW_DATA_DIR}", self.logs, log_level="ERROR")
             raise FileNotFoundError("No scraped data files found in the raw data directory.")
-        
-        # Load the latest file by date
-        latest_file = max(files)
-        with open(path.join(self.RAW_DATA_DIR, latest_file), "r", encoding="utf-8") as f:
-            return load(f)
+        return data
         
     def clean_news(self, news_data):
         """
@@ -48,49 +45,72 @@ class NewsSelector:
                 unique_data.append(new)
 
         # Add specific patterns that match to remove
-        patterns = self.config["patterns_to_remove"]
         for news in unique_data:
-            for pattern in patterns:
-                news["content"] = sub(pattern, "", news["content"]).strip()
+            self.clean_item(news)
         log_message(f"Found {len(unique_data)} news to categorize!", self.logs)
         return unique_data
     
+    def clean_item(self, news):
+        """
+        Remove unrelated prefixes/suffixes from the content of a single news item.
+        """
+        for pattern in self.config["patterns_to_remove"]:
+            news["content"] = sub(pattern, "", news["content"]).strip()
+        return news
+
     def language_detection(self, text):
         """
         Detect the language using langdetect.
         """
+        from langdetect import detect as lang_detector
+
         language = lang_detector(text)
         if language == 'es':
 
             return language
         return 'en'
 
-    def tokenize_text(self, text, language_parameters):
+    def language_blocks(self, language, categories):
         """
-        Compute score of matching to category based on keywords.
+        Return the keywords of a language by shared category. Blocks are paired with the categories
+        by name, or by position when the language names them differently.
         """
-        # Convert to lowercase and remove special characters
-        text = text.lower()
-        text = sub(language_parameters["characters"], '', text)
+        blocks = self.config["languages"][language]["content_blocks"]
+        if set(blocks) <= set(categories):
+            return {category: blocks.get(category, []) for category in categories}
+        return dict(zip(categories, blocks.values()))
 
-        # Tokenize
-        language = language_parameters["stopwords"]
-        tokens = word_tokenize(text, language=language)
-        
-        # Remove stopwords
-        stop_words = set(stopwords.words(language))
-        tokens = [word for word in tokens if word not in stop_words]
-    
-        return tokens
-    
-    def calculate_score(self, tokens, content_blocks):
+    def keyword_matcher(self, language, categories):
+        """
+        Build the keyword automaton of a language once from its own content blocks, with the accent
+        folding and stemming options of 'matching'.
+        """
+        matcher = self.matchers.get(language)
+        if matcher is None:
+            matching = self.config.get("matching", {})
+            language_parameters = self.config["languages"][language]
+            accents = matching.get("fold_accents", True)
+
+            def normalize(text):
+                return normalize_text(text, language_parameters["characters"], accents=accents)
+
+            stemmer = None
+            if matching.get("stemming", False):
+                from nltk.stem import SnowballStemmer
+                stemmer = SnowballStemmer(language_parameters["stopwords"])
+            matcher = self.matchers[language] = KeywordMatcher(self.language_blocks(language, categories),
+                                                               normalize=normalize, stemmer=stemmer,
+                                                               min_stem_length=matching.get("min_stem_length", 4))
+        return matcher
+
+    def calculate_score(self, matches, content_blocks):
         """
         Compute score of matching to category based on keywords.
         """
         # Calculate scores for each category
         scores = {}
         for category, keywords in content_blocks.items():
-            match_count = sum(1 for token in tokens if token in keywords)
+            match_count = len(matches.get(category, ()))
             if keywords:
                 scores[category] = round((match_count / len(keywords)) * 200, 2)
             else:
@@ -101,6 +121,29 @@ class NewsSelector:
         best_score = scores[best_category]
         return best_category, best_score
 
+    def score_news(self, news, categories):
+        """
+        Detect the language of a news item and compute its best category and score.
+        """
+        # Detect language
+        with tracer.span("select.langdetect", article=news.get('link', '')):
+            language = self.language_detection(news.get('content', ''))
+
+        # Find the keywords of every category in the title and content in one pass
+        with tracer.span("select.match", article=news.get('link', '')):
+            matcher = self.keyword_matcher(language, categories)
+            matches = matcher.match(news.get('title', ''), news.get('content', ''))
+
+        # Calculate the best category and score against the keywords of the article's language
+        best_category, score = self.calculate_score(matches, matcher.content_blocks)
+        tracer.count("articles", stage="select")
+        tracer.count("keywords", sum(len(keywords) for keywords in matches.values()), stage="select")
+
+        # Add the score and language to the news item
+        news['languages'] = language
+        news['score'] = score
+        return best_category, score
+
     def categorize_news(self, cleaned_data):
         """
         Categorize news into content blocks based on keywords and ECHO detection.
@@ -116,21 +159,8 @@ class NewsSelector:
         highest_score = 0
 
         for news in cleaned_data:
-            # Detect language
-            language = self.language_detection(news.get('content', ''))
-            language_parameters =self.config["languages"][language]
-
-            # Tokenize and combine
-            title_tokens = self.tokenize_text(news.get('title', ''), language_parameters)
-            content_tokens = self.tokenize_text(news.get('content', ''), language_parameters)
-            all_tokens = set(title_tokens + content_tokens)
-
-            # Calculate the best category and score
-            best_category, score = self.calculate_score(all_tokens, categories)
-
-            # Add the score and language to the news item
-            news['languages'] = language
-            news['score'] = score
+            # Score the news item
+            best_category, score = self.score_news(news, categories)
 
             # Get the main new for the Newsletter
             if score > highest_score:
@@ -159,20 +189,19 @@ class NewsSelector:
             categorized_news["sections"][category].sort(key=lambda x: x['score'], reverse=True)
             categorized_news["sections"][category] = categorized_news["sections"][category][:max_news_per_block]
             log_message(f"Category '{category}' has {len(categorized_news['sections'][category])} news items selected.", 
-                    self.logs)
+                    self.logs, stage="select")
             
         return categorized_news
 
     def save_selected_news(self, final_selection):
         """
-        Save the selected news into a processed JSON file.
+        Save the selected news into a processed data file.
         """
-        # Save the scraped news to a JSON file
-        output_file = path.join(self.PRCS_DATA_DIR, f"selected_news_{datetime.now().strftime('%Y%m%d')}.json")
-        with open(output_file, "w", encoding="utf-8") as f:
-            dump(final_selection, f, ensure_ascii=False, indent=4)
+        # Save the selected news in the configured inter-stage format
+        output_file = save_stage_output("select", final_selection, self.PRCS_DATA_DIR, "selected_news")
 
         log_message(f"Selected news saved to {output_file}", self.logs)
+        return output_file
 
     def run_selector(self):
         """
@@ -191,6 +220,7 @@ class NewsSelector:
         final_selection = self.select_top_news(categorized_news)
 
         log_message("Saving selected news...", self.logs)
-        self.save_selected_news(final_selection)
+        output_file = self.save_selected_news(final_selection)
 
-        log_message("Newsletter selection complete.", self.logs)
\ No newline at end of file
+        log_message("Newsletter selection complete.", self.logs)
+        return output_file
\ No newline at end of file
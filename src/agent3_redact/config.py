@@ -1,31 +1,25 @@
-from os import path
-from json import load, JSONDecodeError
 from src.common.path import RDCT_CONFIG_PATH
+from src.common.settings import load_settings, validate_schema
+
+SCHEMA = {
+    "logs": (str, "a string of file name"),
+    "paths": (dict, "a dict of strings for paths"),
+    "summarization_model": (str, "a string of LLM name"),
+    "translator_model": (str, "a string of LLM name")
+}
+
+OPTIONAL = {
+    "device": ((str, int), "a device name such as 'cuda' or 'cpu'")
+}
 
 def load_config(config_path=RDCT_CONFIG_PATH):
     """
-    Load and validate the selection configuration JSON file.
+    Load and validate the redaction configuration JSON file, cached until the file changes.
     """
-    if not path.exists(config_path):
-        raise FileNotFoundError(f"Configuration file not found: {config_path}")
-
-    with open(config_path, "r", encoding="utf-8") as file:
-        try:
-            config = load(file)
-            validate_config(config)
-            return config
-        except JSONDecodeError as e:
-            raise ValueError(f"Error decoding JSON configuration: {e}")
+    return load_settings(config_path, validate_config)
 
 def validate_config(config):
     """
-    Validate the structure of the selection configuration file.
+    Validate the structure of the redaction configuration file.
     """
-    if "logs" not in config or not isinstance(config["logs"], str):
-        raise ValueError("Invalid configuration: 'logs' must be a string of file name.")
-    if "paths" not in config or not isinstance(config["paths"], dict):
-        raise ValueError("Invalid configuration: 'paths' must be a dict of strings for paths.")
-    if "summarization_model" not in config or not isinstance(config["summarization_model"], str):
-        raise ValueError("Invalid configuration: 'summarization_model' must be a string of LLM name.")
-    if "translator_model" not in config or not isinstance(config["translator_model"], str):
-        raise ValueError("Invalid configuration: 'translator_model' must be a string of LLM name.")
\ No newline at end of file
+    validate_schema(config, SCHEMA, OPTIONAL)
\ No newline at end of file
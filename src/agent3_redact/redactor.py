@@ -1,14 +1,15 @@
-from os import path, listdir
-from json import load, dump
-from datetime import datetime
+from re import split
+from time import perf_counter
 from src.agent3_redact.config import load_config
+from src.common.deadline import deadline
 from src.common.logs import log_message
 from src.common.path import get_full_path
-from transformers import pipeline, BartTokenizer
+from src.common.storage import load_stage_output, save_stage_output
+from src.common.tracing import tracer
 
 class NewsRedactor:
-    def __init__(self, log_path=None):
-        self.config = load_config()
+    def __init__(self, log_path=None, config=None, load_models=True):
+        self.config = config or load_config()
         self.PRCS_DATA_DIR = get_full_path(self.config["paths"]["input"])
         self.RDCT_DATA_DIR = get_full_path(self.config["paths"]["output"])
 
@@ -16,18 +17,38 @@ class NewsRedactor:
             self.logs = log_path
         else:
             self.logs = self.config["logs"]
+
+        # Summaries already produced in this process, keyed by link and length limit
+        self.summary_cache = {}
+        # Durations of the summaries made so far, to tell whether the next one fits in the budget
+        self.summary_seconds = []
+        # Summaries of the previous run, used when the models cannot be
+        self.previous = None
+        if load_models:
+            self.load_models()
+
+    def load_models(self):
+        """
+        Load the summarization and translation models on the configured device.
+        """
+        device = self.config.get("device", "cuda")
         try:
+            # Imported here so stages that do not summarize never pay for loading transformers
+            from transformers import pipeline, BartTokenizer
+
             # Load the summarizing model
             summary_model = self.config["summarization_model"]
             log_message(f"Loading Model {summary_model}...", self.logs)
-            self.summarizer = pipeline("summarization", model=summary_model, tokenizer=summary_model, device="cuda")
-            self.tokenizer = BartTokenizer.from_pretrained(summary_model)
+            with tracer.span("redact.model_load", model=summary_model):
+                self.summarizer = pipeline("summarization", model=summary_model, tokenizer=summary_model, device=device)
+                self.tokenizer = BartTokenizer.from_pretrained(summary_model)
             log_message(f"Model {summary_model} loaded!", self.logs)
 
             # Load the translate model
             translator_model = self.config["translator_model"]
             log_message(f"Loading Model {translator_model}...", self.logs)
-            self.translator = pipeline("translation_en_to_es", model=translator_model, device="cuda")
+            with tracer.span("redact.model_load", model=translator_model):
+                self.translator = pipeline("translation_en_to_es", model=translator_model, device=device)
             log_message(f"Model {translator_model} loaded!", self.logs)
 
         except OSError as e:
@@ -35,19 +56,26 @@ class NewsRedactor:
         except Exception as e:
             log_message(f"Error: An unexpected error occurred: {e}", self.logs, log_level="ERROR")
 
+    def share_models(self, other):
+        """
+        Reuse the models and summary cache of another redactor loaded with the same models,
+        so editions that summarize the same article do it once.
+        """
+        # Models that failed to load are missing, this redactor then falls back like the other one
+        self.summarizer = getattr(other, "summarizer", None)
+        self.tokenizer = getattr(other, "tokenizer", None)
+        self.translator = getattr(other, "translator", None)
+        self.summary_cache = other.summary_cache
+
     def load_data(self):
         """
-        Load processed data in JSON format.
+        Load the latest processed data.
         """
-        files = [f for f in listdir(self.PRCS_DATA_DIR) if f.endswith(".json")]
-        if not files:
+        data, _ = load_stage_output("select", self.PRCS_DATA_DIR)
+        if data is None:
             log_message(f"Error: No processed data files found in {self.PRCS_DATA_DIR}", self.logs, log_level="ERROR")
             raise FileNotFoundError("No processed data files found in the processed data directory.")
-        
-        # Load the latest file by modification date
-        latest_file = max(files)
-        with open(path.join(self.PRCS_DATA_DIR, latest_file), "r", encoding="utf-8") as f:
-            return load(f)
+        return data
             
     def generate_summary(self, text, limit, max_tokens=1024, min_tokens=20):
         """
@@ -56,6 +84,7 @@ class NewsRedactor:
         # Tokenize and chunk the text into segments of max_tokens
         inputs = self.tokenizer(text, return_tensors="pt", truncation=False)
         input_ids = inputs["input_ids"][0]
+        tracer.count("tokens", len(input_ids), stage="redact")
         chunk_size = max_tokens - limit - 10
         chunks = [input_ids[i:i+chunk_size] for i in range(0, len(input_ids), chunk_size)]
 
@@ -63,10 +92,11 @@ class NewsRedactor:
         for chunk in chunks:
             # Decode chunk back to text for summarization
             chunk_text = self.tokenizer.decode(chunk, skip_special_tokens=True)
-            summary = self.summarizer(chunk_text,
-                                      max_length=limit,
-                                      min_length=min_tokens,
-                                      do_sample=False)[0]["summary_text"]
+            with tracer.span("redact.summarize_chunk", tokens=len(chunk)):
+                summary = self.summarizer(chunk_text,
+                                          max_length=limit,
+                                          min_length=min_tokens,
+                                          do_sample=False)[0]["summary_text"]
             summaries.append(summary)
 
         if len(summaries) == 1:
@@ -74,10 +104,11 @@ class NewsRedactor:
 
         # Combine all summaries into a final summary
         combined_text = ". ".join(summaries)
-        final_summary = self.summarizer(combined_text, 
-                                        max_length=limit, 
-                                        min_length=min_tokens,
-                                        do_sample=False)[0]["summary_text"]
+        with tracer.span("redact.summarize_combined", chunks=len(summaries)):
+            final_summary = self.summarizer(combined_text, 
+                                            max_length=limit, 
+                                            min_length=min_tokens,
+                                            do_sample=False)[0]["summary_text"]
 
         return final_summary
 
@@ -86,19 +117,115 @@ class NewsRedactor:
         Translate the summary using a pre-trained translation model.
         """
         # Parameterize the LLM (e.g., max tokens)
-        translation = self.translator(text, min_length=min_tokens, do_sample=False)[0]['translation_text']
+        with tracer.span("redact.translate"):
+            translation = self.translator(text, min_length=min_tokens, do_sample=False)[0]['translation_text']
 
         return translation
     
+    def lead_extract(self, text, max_words):
+        """
+        Cheap stand-in for a summary: the leading sentences of the article, up to max_words words.
+        """
+        words = []
+        for sentence in split(r"(?<=[.!?])\s+", text.strip()):
+            sentence_words = sentence.split()
+            if words and len(words) + len(sentence_words) > max_words:
+                break
+            words.extend(sentence_words)
+        return " ".join(words[:max_words])
+
+    def previous_summaries(self):
+        """
+        Summaries of the latest redacted output on disk, keyed like summary_cache, loaded once.
+        """
+        if self.previous is None:
+            self.previous = {}
+            try:
+                data, _ = load_stage_output("redact", self.RDCT_DATA_DIR)
+            except Exception:
+                data = None
+            if data:
+                main = data.get("Main") or {}
+                if main.get("link"):
+                    self.previous[(main["link"], 30)] = main["summary"]
+                for news_list in data.get("sections", {}).values():
+                    for news in news_list:
+                        self.previous[(news.get("link", ""), 100)] = news["summary"]
+        return self.previous
+
+    def translate_extract(self, extract):
+        """
+        Translate the lead extract of an English article when the translator is loaded, as a
+        translation is much cheaper than a summary. Returns the text and whether it was translated.
+        """
+        if getattr(self, "translator", None) is None:
+            return extract, False
+        try:
+            return self.translate_summary(extract), True
+        except Exception as e:
+            log_message(f"Error: Could not translate the extract: {e}", self.logs, log_level="WARNING",
+                        stage="redact")
+            return extract, False
+
+    def degradation_reason(self):
+        """
+        Return why the next article cannot be summarized by the models, or None if it can.
+        """
+        if getattr(self, "summarizer", None) is None:
+            return "no summarization model is loaded in this process"
+        remaining = deadline.stage_remaining("redact")
+        if remaining <= 0:
+            return "the redaction budget is spent"
+        if self.summary_seconds and remaining < sum(self.summary_seconds) / len(self.summary_seconds):
+            return f"a summary would overrun the redaction budget ({remaining:.1f}s left)"
+        return None
+
+    def summarize_news(self, news, parameters=100):
+        """
+        Summarize an article with the models, translating English summaries.
+        """
+        with tracer.span("redact.article", article=news.get("link", "")):
+            content = news.get("content", "")
+            summary = self.generate_summary(content, parameters)
+            if news.get("languages") == "en":
+                summary = self.translate_summary(summary)
+        tracer.count("articles", stage="redact")
+        return summary
+
     def format_news(self, news, parameters=100):
         """
         Format the main new of the Newsletter.
         """
         # Generate a summary and key concept using the LLM library
-        content = news.get("content", "")
-        summary = self.generate_summary(content, parameters)
-        if news.get("en", "en") == "en":
-            summary = self.translate_summary(summary)
+        key = (news.get("link", ""), parameters)
+        summary = self.summary_cache.get(key)
+        if summary is None:
+            reason = self.degradation_reason()
+            if reason is None:
+                try:
+                    start = perf_counter()
+                    summary = self.summarize_news(news, parameters)
+                    self.summary_seconds.append(perf_counter() - start)
+                    self.summary_cache[key] = summary
+                except Exception as e:
+                    reason = f"summarization failed: {e}"
+
+            if reason is not None:
+                # Fall back to last run's summary of the same article, or to its lead sentences
+                summary = self.previous_summaries().get(key)
+                strategy = "reused the previous summary"
+                fields = {}
+                if summary is None:
+                    summary = self.lead_extract(news.get("content", ""), parameters)
+                    strategy = "used a lead-sentence extract"
+                    if news.get("languages") == "en" and summary:
+                        summary, translated = self.translate_extract(summary)
+                        strategy = ("used a translated lead-sentence extract" if translated
+                                    else "used a lead-sentence extract left in English")
+                        # Recorded so an English text in the edition can be traced to this fallback
+                        fields["language"] = "es" if translated else "en"
+                deadline.degrade("redact", f"{strategy} for {key[0]}, {reason}", self.logs, article=key[0],
+                                 **fields)
 
         return {
             "summary": summary,
@@ -117,11 +244,16 @@ class NewsRedactor:
 
         # Redact the main new
         log_message(f"Processing main new", self.logs)
-        principal_dict["Main"] = self.format_news(data["Main"], parameters=30)
+        if data.get("Main"):
+            principal_dict["Main"] = self.format_news(data["Main"], parameters=30)
+        else:
+            # Nothing was selected, e.g. the budget ran out before any article was scraped
+            log_message("No main news was selected.", self.logs, log_level="WARNING", stage="redact")
+            principal_dict["Main"] = {}
         
         # Redact the news
         for block_name, news_list in categorized_news.items():
-            log_message(f"Processing block: {block_name}", self.logs)
+            log_message(f"Processing block: {block_name}", self.logs, stage="redact")
             formatted_news = []
             for news in news_list:
                 formatted_news.append(self.format_news(news))
@@ -135,11 +267,10 @@ class NewsRedactor:
         """
         Save the formatted newsletter to the output directory.
         """
-        output_file = path.join(self.RDCT_DATA_DIR, f"redacted_news_{datetime.now().strftime('%Y%m%d')}.json")
-        with open(output_file, "w", encoding="utf-8") as f:
-            dump(content, f, ensure_ascii=False, indent=4)
+        output_file = save_stage_output("redact", content, self.RDCT_DATA_DIR, "redacted_news")
 
         log_message(f"Redacted news saved to: {output_file}", self.logs)
+        return output_file
 
     def run_redactor(self):
         """
@@ -152,6 +283,7 @@ class NewsRedactor:
         newsletter_content = self.redact_newsletter(data)
 
         log_message("Saving redacted news...", self.logs)
-        self.save_newsletter(newsletter_content)
+        output_file = self.save_newsletter(newsletter_content)
 
-        log_message("Newsletter redaction complete.", self.logs)
\ No newline at end of file
+        log_message("Newsletter redaction complete.", self.logs)
+        return output_file
\ No newline at end of file
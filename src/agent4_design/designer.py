@@ -1,13 +1,15 @@
-from os import path, listdir
-from json import load
+from os import path
 from datetime import datetime
 from src.agent4_design.config import load_config
+from src.common.deadline import deadline
 from src.common.path import get_full_path
 from src.common.logs import log_message
+from src.common.storage import load_stage_output, register_stage_output
+from src.common.tracing import tracer
 
 class NewsDesigner:
-    def __init__(self, log_path=None):
-        self.config = load_config()
+    def __init__(self, log_path=None, config=None):
+        self.config = config or load_config()
         self.RDCT_DATA_DIR = get_full_path(self.config["paths"]["input"])
         self.NEWSLETTER_DIR = get_full_path(self.config["paths"]["output"])
         self.TMPLT_PATH = get_full_path(self.config["paths"]["template"])
@@ -19,17 +21,13 @@ class NewsDesigner:
 
     def load_data(self):
         """
-        Load redacted data in JSON format.
+        Load the latest redacted data.
         """
-        files = [f for f in listdir(self.RDCT_DATA_DIR) if f.endswith(".json")]
-        if not files:
+        data, _ = load_stage_output("redact", self.RDCT_DATA_DIR)
+        if data is None:
             log_message(f"Error: No redacted data files found in {self.RDCT_DATA_DIR}", self.logs, log_level="ERROR")
             raise FileNotFoundError("No redacted data files found in the redacted data directory.")
-        
-        # Load the latest file by modification date
-        latest_file = max(files)
-        with open(path.join(self.RDCT_DATA_DIR, latest_file), "r", encoding="utf-8") as f:
-            return load(f)
+        return data
         
     def load_template(self):
         """
@@ -47,7 +45,7 @@ class NewsDesigner:
         """
         Generate HTML for a specific section with multiple news items.
         """
-        formatted_block_name = self.config["sections"][block_name]
+        formatted_block_name = self.config["sections"].get(block_name, block_name)
         section_html = (
             f"<h3 style='text-align: center;'>" +
                 f"<span style='color:#13285b;'>{formatted_block_name}</span></h3><br/>"
@@ -62,17 +60,28 @@ class NewsDesigner:
 
     def generate_html(self, rdct_data):
         """
-        Generate the final HTML content.
+        Generate the final HTML content. Raises ValueError when no news has a summary.
         """
         template = self.load_template()
         html_configs = self.config["html_parts"]
         body_content = html_configs["body_init"]
 
-        # Insert main content
-        main = rdct_data["Main"]
+        # Insert main content, promoting the first section news if the main one is missing
+        sections = {block_name: [item for item in news_items if item.get("summary")]
+                    for block_name, news_items in rdct_data.get("sections", {}).items()}
+        main = rdct_data.get("Main") or {}
+        if not main.get("summary"):
+            block_name = next((name for name, items in sections.items() if items), None)
+            if block_name is None:
+                # An empty edition must not be delivered
+                log_message("Error: No news is ready, the edition has no content", self.logs, log_level="ERROR")
+                raise ValueError("No news is ready, the edition has no content.")
+            main = sections[block_name].pop(0)
+            deadline.degrade("design", f"no main news is ready, promoted {main.get('link', '')}", self.logs,
+                             section=block_name)
         body_content += (
             f"<h2 style='text-align: left;'><span style='color:#13285b;'>"+
-                f"<a href={main['link']} target='_blank' style='color: #13285b; text-decoration: none;'>"+
+                f"<a href={main.get('link', '')} target='_blank' style='color: #13285b; text-decoration: none;'>"+
                 f"<b>{main['summary']}</b></a></span></h2><br/><p style='text-align: left;' class='last-child'>"+
                 f"<span style='color:#707070;'>{datetime.now().strftime('%B %d, %Y')} • Boletín #102</span></p>"
             )
@@ -80,13 +89,17 @@ class NewsDesigner:
         body_content += html_configs["body_news"]
 
         # Insert sections
-        for idx, (block_name, news_items) in enumerate(rdct_data["sections"].items()):
-            if idx == 0:
-                # Action for the first iteration
-                body_content += self.generate_section(block_name, news_items)
+        advertised = False
+        for block_name, news_items in sections.items():
+            if not news_items:
+                log_message(f"Section {block_name} has no news ready, it is left out.", self.logs,
+                            log_level="WARNING", stage="design", section=block_name)
+                continue
+            body_content += self.generate_section(block_name, news_items)
+            if not advertised:
+                # The advertisement follows the first section
                 body_content += html_configs["advertisement"]
-            else:
-                body_content += self.generate_section(block_name, news_items)
+                advertised = True
 
         body_content += html_configs["body_close"]
 
@@ -104,8 +117,10 @@ class NewsDesigner:
         output_file = path.join(self.NEWSLETTER_DIR, f"Newsletter_{datetime.now().strftime('%Y%m%d')}.html")
         with open(output_file, "w", encoding="utf-8") as f:
             f.write(content)
+        register_stage_output("design", output_file, "html")
 
         log_message(f"Newsletter saved to: {output_file}", self.logs)
+        return output_file
 
     def run_designer(self):
         """
@@ -115,9 +130,12 @@ class NewsDesigner:
         data = self.load_data()
 
         log_message("Generating html file...", self.logs)
-        formatted_html = self.generate_html(data)
+        with tracer.span("design.render"):
+            formatted_html = self.generate_html(data)
+        tracer.count("bytes", len(formatted_html.encode("utf-8")), stage="design")
       
         log_message("Saving Newsletter...", self.logs)
-        self.save_Newsletter(formatted_html)
+        output_file = self.save_Newsletter(formatted_html)
 
-        log_message("Newsletter design complete.", self.logs)
\ No newline at end of file
+        log_message("Newsletter design complete.", self.logs)
+        return output_file
\ No newline at end of file
@@ -0,0 +1 @@
+from .deliverer import NewsDeliverer
\ No newline at end of file
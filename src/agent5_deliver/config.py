@@ -0,0 +1,28 @@
+from src.common.path import DLVR_CONFIG_PATH
+from src.common.settings import load_settings, validate_schema
+
+SCHEMA = {
+    "logs": (str, "a string of file name"),
+    "paths": (dict, "a dict of strings for paths"),
+    "smtp": (dict, "a dict of server definitions"),
+    "sender": (str, "a string of email address"),
+    "subject": (str, "a string"),
+    "connections": (int, "a positive int"),
+    "rate_limit": ((int, float), "a number of messages per second")
+}
+
+def load_config(config_path=DLVR_CONFIG_PATH):
+    """
+    Load and validate the delivery configuration JSON file, cached until the file changes.
+    """
+    return load_settings(config_path, validate_config)
+
+def validate_config(config):
+    """
+    Validate the structure of the delivery configuration file.
+    """
+    validate_schema(config, SCHEMA)
+    if "host" not in config["smtp"] or "port" not in config["smtp"]:
+        raise ValueError(f"Invalid SMTP definition: {config['smtp']}")
+    if config["connections"] < 1:
+        raise ValueError("Invalid configuration: 'connections' must be a positive int.")
\ No newline at end of file
@@ -0,0 +1,401 @@
+from os import path, environ, fsync
+from re import compile as compile_regex
+from json import loads, dumps
+from time import monotonic, sleep
+from datetime import datetime
+from queue import Queue, Empty
+from threading import Thread, Lock
+from email.message import EmailMessage
+from email.policy import SMTP as SMTP_POLICY
+from email.utils import formatdate, make_msgid
+from smtplib import (SMTP, SMTP_SSL, SMTPException, SMTPServerDisconnected, SMTPSenderRefused,
+                     SMTPRecipientsRefused, SMTPDataError, quoteaddr)
+from src.agent5_deliver.config import load_config
+from src.common.logs import log_message
+from src.common.path import get_full_path
+from src.common.storage import find_stage_output
+from src.common.tracing import tracer
+
+# Lines starting with a period are escaped in the DATA content (RFC 5321, section 4.5.2)
+LEADING_PERIOD = compile_regex(rb"(?m)^\.")
+
+class DeliveryUnconfirmed(SMTPException):
+    """
+    Raised when a message was transmitted but the server's reply was lost, so it may have been accepted.
+    """
+
+class RateLimiter:
+    """
+    Token bucket shared by every connection to cap the global sending rate.
+    """
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = monotonic()
+        self.lock = Lock()
+
+    def acquire(self):
+        """
+        Block until one message may be sent. A rate of 0 disables throttling.
+        """
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            sleep(wait)
+
+class SendLog:
+    """
+    Append-only JSON lines journal of delivery attempts for one edition.
+    A 'pending' entry is made durable before a message is handed to the server and a 'sent'
+    entry after it is accepted, so a rerun after a crash never sends twice to the same address.
+    """
+    def __init__(self, log_file, sync=True):
+        self.log_file = log_file
+        self.sync = sync
+        self.lock = Lock()
+        self.sent, self.unconfirmed = self.replay()
+        self.handle = open(self.log_file, "a", encoding="utf-8")
+
+    def replay(self):
+        """
+        Rebuild the last known status of every recipient from the journal.
+        """
+        states = {}
+        if not path.exists(self.log_file):
+            return set(), set()
+
+        with open(self.log_file, "r", encoding="utf-8") as f:
+            content = f.read()
+        for line in content.splitlines():
+            try:
+                entry = loads(line)
+            except ValueError:
+                # A torn last line left by a crash is ignored
+                continue
+            for recipient in entry.get("recipients", []):
+                states[recipient] = entry.get("status")
+
+        # Terminate a torn last line so the next entry starts cleanly
+        if content and not content.endswith("\n"):
+            with open(self.log_file, "a", encoding="utf-8") as f:
+                f.write("\n")
+
+        sent = {r for r, status in states.items() if status == "sent"}
+        unconfirmed = {r for r, status in states.items() if status == "pending"}
+        return sent, unconfirmed
+
+    def record(self, recipients, status, error=None):
+        """
+        Append an entry for a group of recipients and flush it to disk.
+        """
+        entry = {
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "status": status,
+            "recipients": list(recipients)
+        }
+        if error:
+            entry["error"] = str(error)
+        with self.lock:
+            self.handle.write(dumps(entry, ensure_ascii=False) + "\n")
+            self.handle.flush()
+            if self.sync:
+                fsync(self.handle.fileno())
+
+    def close(self):
+        self.handle.close()
+
+class NewsDeliverer:
+    def __init__(self, log_path=None, config=None):
+        self.config = config or load_config()
+        self.NEWSLETTER_DIR = get_full_path(self.config["paths"]["input"])
+        self.DLVR_DATA_DIR = get_full_path(self.config["paths"]["output"])
+        self.RECIPIENTS_PATH = get_full_path(self.config["paths"]["recipients"])
+
+        if log_path:
+            self.logs = log_path
+        else:
+            self.logs = self.config["logs"]
+
+        self.stats_lock = Lock()
+        self.stats = {"sent": 0, "failed": 0, "unconfirmed": 0}
+
+    def load_newsletter(self):
+        """
+        Load the latest rendered Newsletter and return its edition name and HTML.
+        """
+        latest_file, _ = find_stage_output("design", self.NEWSLETTER_DIR, extensions=(".html",))
+        if latest_file is None:
+            log_message(f"Error: No newsletters found in {self.NEWSLETTER_DIR}", self.logs, log_level="ERROR")
+            raise FileNotFoundError("No newsletters found in the newsletters directory.")
+
+        with open(latest_file, "r", encoding="utf-8") as f:
+            return path.splitext(path.basename(latest_file))[0], f.read()
+
+    def load_recipients(self):
+        """
+        Load the recipient addresses, one per line. Blank lines and '#' comments are skipped.
+        """
+        if not path.exists(self.RECIPIENTS_PATH):
+            log_message(f"Error: Recipients file not found: {self.RECIPIENTS_PATH}", self.logs, log_level="ERROR")
+            raise FileNotFoundError(f"Recipients file not found: {self.RECIPIENTS_PATH}")
+
+        recipients = []
+        seen = set()
+        with open(self.RECIPIENTS_PATH, "r", encoding="utf-8") as f:
+            for line in f:
+                address = line.strip()
+                if not address or address.startswith("#"):
+                    continue
+                try:
+                    address = self.normalize_address(address)
+                except ValueError as e:
+                    log_message(f"Error: Skipping recipient {address}: {e}", self.logs, log_level="WARNING")
+                    continue
+                if address in seen:
+                    continue
+                seen.add(address)
+                recipients.append(address)
+        return recipients
+
+    def normalize_address(self, address):
+        """
+        Return the address in the ASCII form the SMTP commands are sent in, with an
+        internationalized domain IDNA-encoded. Raises ValueError if it cannot be sent.
+        """
+        local, at, domain = address.rpartition("@")
+        if not at or not local or not domain:
+            raise ValueError("not an email address")
+        if not local.isascii():
+            raise ValueError("non-ASCII local parts are not supported")
+        try:
+            domain = domain.encode("idna").decode("ascii")
+        except UnicodeError as e:
+            raise ValueError(f"invalid domain: {e}") from None
+        return f"{local}@{domain}"
+
+    def render_body(self, html):
+        """
+        Serialize the headers and body shared by every message once, so each send only
+        prepends its own envelope headers.
+        """
+        message = EmailMessage(policy=SMTP_POLICY)
+        message["Subject"] = self.config["subject"]
+        message["From"] = self.config["sender"]
+        message["Date"] = formatdate(localtime=True)
+        message.set_content(html, subtype="html")
+        return message.as_bytes()
+
+    def build_message(self, body, recipients):
+        """
+        Build the raw message for a group of recipients from the pre-rendered body.
+        """
+        to_header = recipients[0] if len(recipients) == 1 else "undisclosed-recipients:;"
+        headers = f"To: {to_header}\r\nMessage-ID: {make_msgid()}\r\n"
+        return headers.encode("utf-8") + body
+
+    def open_connection(self):
+        """
+        Open and authenticate a persistent connection to the SMTP server.
+        """
+        smtp = self.config["smtp"]
+        timeout = smtp.get("timeout", 30)
+        if smtp.get("use_ssl", False):
+            connection = SMTP_SSL(smtp["host"], smtp["port"], timeout=timeout)
+        else:
+            connection = SMTP(smtp["host"], smtp["port"], timeout=timeout)
+            if smtp.get("starttls", False):
+                connection.starttls()
+        connection.ehlo_or_helo_if_needed()
+
+        username = smtp.get("username")
+        if username:
+            connection.login(username, environ.get(smtp.get("password_env", "SMTP_PASSWORD"), ""))
+        return connection
+
+    def send_envelope(self, connection, recipients):
+        """
+        Send the MAIL FROM and RCPT TO commands for one message. When the server advertises
+        PIPELINING (RFC 2920) they go out in a single write and the replies are read afterwards.
+        Returns the refused recipients.
+        """
+        sender = self.config["sender"]
+        refused = {}
+        connection.ehlo_or_helo_if_needed()
+
+        if connection.has_extn("pipelining"):
+            commands = [f"MAIL FROM:{quoteaddr(sender)}\r\n"]
+            commands.extend(f"RCPT TO:{quoteaddr(recipient)}\r\n" for recipient in recipients)
+            connection.send("".join(commands))
+            code, response = connection.getreply()
+            for recipient in recipients:
+                rcpt_code, rcpt_response = connection.getreply()
+                if rcpt_code not in (250, 251):
+                    refused[recipient] = (rcpt_code, rcpt_response)
+        else:
+            code, response = connection.mail(sender)
+            if code == 250:
+                for recipient in recipients:
+                    rcpt_code, rcpt_response = connection.rcpt(recipient)
+                    if rcpt_code not in (250, 251):
+                        refused[recipient] = (rcpt_code, rcpt_response)
+
+        if code != 250:
+            connection.rset()
+            raise SMTPSenderRefused(code, response, sender)
+        if len(refused) == len(recipients):
+            connection.rset()
+            raise SMTPRecipientsRefused(refused)
+        return refused
+
+    def send_data(self, connection, body, recipients):
+        """
+        Send the message content once the envelope has been accepted. Errors once the whole content
+        is transmitted raise DeliveryUnconfirmed, as the server may have accepted the message.
+        """
+        code, response = connection.docmd("DATA")
+        if code != 354:
+            connection.rset()
+            raise SMTPDataError(code, response)
+
+        message = LEADING_PERIOD.sub(b"..", self.build_message(body, recipients))
+        if not message.endswith(b"\r\n"):
+            message += b"\r\n"
+        connection.send(message + b".\r\n")
+        try:
+            code, response = connection.getreply()
+        except SMTPException as e:
+            raise DeliveryUnconfirmed(f"No reply after the message content: {e}") from e
+        if code != 250:
+            connection.rset()
+            raise SMTPDataError(code, response)
+
+    def close_connection(self, connection):
+        try:
+            connection.quit()
+        except (SMTPException, OSError):
+            connection.close()
+
+    def deliver_worker(self, jobs, body, send_log, limiter):
+        """
+        Consume recipient groups from the shared queue over a single persistent connection.
+        """
+        connection = None
+        while True:
+            try:
+                recipients = jobs.get_nowait()
+            except Empty:
+                break
+
+            limiter.acquire()
+            send_log.record(recipients, "pending")
+            try:
+                if connection is None:
+                    connection = self.open_connection()
+                try:
+                    refused = self.send_envelope(connection, recipients)
+                except SMTPServerDisconnected:
+                    # Dropped before the envelope was accepted, so nothing was delivered yet
+                    self.close_connection(connection)
+                    connection = self.open_connection()
+                    refused = self.send_envelope(connection, recipients)
+                self.send_data(connection, body, recipients)
+            except DeliveryUnconfirmed as e:
+                # Left 'pending', so a rerun does not send it again
+                log_message(f"Error: Delivery to {len(recipients)} recipients is unconfirmed: {e}", self.logs,
+                            log_level="WARNING")
+                with self.stats_lock:
+                    self.stats["unconfirmed"] += len(recipients)
+                self.close_connection(connection)
+                connection = None
+                continue
+            except Exception as e:
+                # Any error leaves the group 'failed' rather than 'pending', which would skip it forever
+                send_log.record(recipients, "failed", error=e)
+                log_message(f"Error: Could not deliver to {len(recipients)} recipients: {e}", self.logs,
+                            log_level="WARNING")
+                with self.stats_lock:
+                    self.stats["failed"] += len(recipients)
+                if connection is not None:
+                    self.close_connection(connection)
+                    connection = None
+                continue
+
+            accepted = [r for r in recipients if r not in refused]
+            send_log.record(accepted, "sent")
+            if refused:
+                send_log.record(list(refused), "failed", error=refused)
+            with self.stats_lock:
+                self.stats["sent"] += len(accepted)
+                self.stats["failed"] += len(refused)
+            tracer.count("messages", len(accepted), stage="deliver")
+
+        if connection is not None:
+            self.close_connection(connection)
+
+    def deliver_newsletter(self, edition, html, recipients):
+        """
+        Deliver an edition to the recipients not yet recorded in its send log, through a pool
+        of concurrent SMTP connections.
+        """
+        log_file = path.join(self.DLVR_DATA_DIR, f"send_log_{edition}.jsonl")
+        send_log = SendLog(log_file, sync=self.config.get("sync_send_log", True))
+
+        if send_log.unconfirmed:
+            log_message(f"{len(send_log.unconfirmed)} recipients have an unconfirmed delivery from a previous run "
+                        "and will be skipped to avoid double-sending.", self.logs, log_level="WARNING")
+        skip = send_log.sent | send_log.unconfirmed
+        pending = [r for r in recipients if r not in skip]
+        log_message(f"{len(pending)} recipients pending out of {len(recipients)} for {edition}.", self.logs)
+
+        # Group recipients sharing one message envelope
+        group_size = self.config.get("recipients_per_message", 1)
+        jobs = Queue()
+        for i in range(0, len(pending), group_size):
+            jobs.put(pending[i:i+group_size])
+
+        body = self.render_body(html)
+        limiter = RateLimiter(self.config["rate_limit"])
+        workers = [
+            Thread(target=self.deliver_worker, args=(jobs, body, send_log, limiter), daemon=True)
+            for _ in range(min(self.config["connections"], jobs.qsize()))
+        ]
+
+        start = monotonic()
+        try:
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        finally:
+            send_log.close()
+        elapsed = monotonic() - start
+
+        throughput = self.stats["sent"] / elapsed if elapsed > 0 else 0.0
+        log_message(f"Delivered {self.stats['sent']} messages ({self.stats['failed']} failed, "
+                    f"{self.stats['unconfirmed']} unconfirmed) in {elapsed:.2f}s "
+                    f"with {len(workers)} connections: {throughput:.1f} msg/s.", self.logs)
+        return self.stats
+
+    def run_deliverer(self):
+        """
+        Main execution of the delivery process.
+        """
+        log_message("Loading last Newsletter...", self.logs)
+        edition, html = self.load_newsletter()
+
+        log_message("Loading recipients...", self.logs)
+        recipients = self.load_recipients()
+
+        log_message(f"Delivering {edition}...", self.logs)
+        self.deliver_newsletter(edition, html, recipients)
+
+        log_message("Newsletter delivery complete.", self.logs)
\ No newline at end of file
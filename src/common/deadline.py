@@ -0,0 +1,102 @@
+from time import monotonic
+from datetime import datetime, timedelta
+from threading import Lock
+from src.common.logs import log_message
+from src.common.tracing import tracer
+
+class Deadline:
+    """
+    Time budget of a run, split between stages by share. A stage's time is its share of what is
+    left when it starts, relative to the shares of the stages still to come, so time saved by a
+    fast stage goes to the following ones and a slow stage cannot eat the time of the last ones.
+    """
+    def __init__(self, budget_seconds=None, shares=None):
+        self.lock = Lock()
+        self.reset(budget_seconds, shares)
+
+    def reset(self, budget_seconds=None, shares=None):
+        """
+        Start a new budget from now.
+        """
+        with self.lock:
+            self.start = monotonic()
+            self.budget_seconds = budget_seconds
+            self.shares = shares or {}
+            self.stage_ends = {}
+            self.degradations = []
+
+    @property
+    def enabled(self):
+        return self.budget_seconds is not None
+
+    def remaining(self):
+        """
+        Seconds left in the run, or infinity without a budget.
+        """
+        if not self.enabled:
+            return float("inf")
+        return self.budget_seconds - (monotonic() - self.start)
+
+    def start_stage(self, stage):
+        """
+        Set the end of a stage from the remaining budget and the shares of this and the later stages.
+        """
+        if not self.enabled or stage not in self.shares:
+            return
+        stages = list(self.shares)
+        upcoming = sum(self.shares[later] for later in stages[stages.index(stage):])
+        allowance = max(0.0, self.remaining()) * (self.shares[stage] / upcoming if upcoming else 1.0)
+        with self.lock:
+            self.stage_ends[stage] = monotonic() + allowance
+
+    def stage_remaining(self, stage):
+        """
+        Seconds left for a stage, bounded by the run's remaining time. Stages not started use the run's.
+        """
+        remaining = self.remaining()
+        with self.lock:
+            end = self.stage_ends.get(stage)
+        if end is None:
+            return remaining
+        return min(remaining, end - monotonic())
+
+    def expired(self, stage=None):
+        return self.stage_remaining(stage) <= 0 if stage else self.remaining() <= 0
+
+    def degrade(self, stage, decision, log_file, **fields):
+        """
+        Record a degradation decision in the run log and the metrics.
+        """
+        with self.lock:
+            self.degradations.append({"stage": stage, "decision": decision, **fields})
+        tracer.count("degradations", stage=stage)
+        log_message(f"Degraded {stage}: {decision}", log_file, log_level="WARNING", stage=stage, degradation=True,
+                    **fields)
+
+deadline = Deadline()
+
+# A 'finish_by' that passed longer ago than this refers to the next day
+ROLLOVER_HOURS = 12
+
+def configure_deadline(log_file, budget_minutes=None, finish_by=None, shares=None):
+    """
+    Start the run's budget: 'budget_minutes' from now and/or 'finish_by' ('HH:MM' local time),
+    whichever ends first. Without either, stages are never cut short. A 'finish_by' that passed
+    less than ROLLOVER_HOURS ago leaves no time, an older one is taken as tomorrow's.
+    """
+    budgets = []
+    if budget_minutes is not None:
+        budgets.append(budget_minutes * 60)
+    if finish_by:
+        now = datetime.now()
+        hour, minute = (int(part) for part in finish_by.split(":"))
+        target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if target <= now - timedelta(hours=ROLLOVER_HOURS):
+            target += timedelta(days=1)
+        elif target <= now:
+            log_message(f"The run started after its finish_by time {finish_by}, every stage is cut short.",
+                        log_file, log_level="WARNING", degradation=True)
+        budgets.append(max(0.0, (target - now).total_seconds()))
+
+    deadline.reset(min(budgets) if budgets else None, shares)
+    return deadline
@@ -0,0 +1,217 @@
+from os import path
+from src.common.deadline import deadline
+from src.common.logs import log_message
+from src.common.path import (get_full_path, EDITIONS_CONFIG_PATH, SCRP_CONFIG_PATH, SLCT_CONFIG_PATH,
+                             RDCT_CONFIG_PATH, DSGN_CONFIG_PATH)
+from src.common.settings import load_settings, validate_schema
+from src.common.tracing import tracer
+
+SCHEMA = {
+    "editions": (list, "a list of edition definitions")
+}
+
+EDITION_SCHEMA = {
+    "name": (str, "a string"),
+    "configs": (dict, "a dict of configuration file paths by stage")
+}
+
+# Configuration file of each stage when an edition does not override it
+DEFAULT_CONFIGS = {
+    "scraping": SCRP_CONFIG_PATH,
+    "selection": SLCT_CONFIG_PATH,
+    "redaction": RDCT_CONFIG_PATH,
+    "design": DSGN_CONFIG_PATH
+}
+
+# Stages whose outputs are found by directory, so every edition needs its own. The delivery
+# folder holds the send log, which would skip a subscriber of two editions for the second one
+SEPARATE_OUTPUTS = ["scraping", "selection", "redaction", "design", "delivery"]
+
+# Site fields that decide what is scraped, sites equal on all of them are scraped once
+SITE_KEY = ["url", "discovery", "feed_url", "news_container", "link_tag", "link_attr"]
+
+def validate_editions(config):
+    """
+    Validate the structure of the editions configuration file.
+    """
+    validate_schema(config, SCHEMA)
+    names = set()
+    for edition in config["editions"]:
+        if not isinstance(edition, dict):
+            raise ValueError(f"Invalid edition definition: {edition}")
+        validate_schema(edition, EDITION_SCHEMA)
+        if edition["name"] in names:
+            raise ValueError(f"Invalid configuration: edition '{edition['name']}' is defined twice.")
+        names.add(edition["name"])
+        unknown = set(edition["configs"]) - set(DEFAULT_CONFIGS) - {"delivery"}
+        if unknown:
+            raise ValueError(f"Invalid configuration: unknown stages {sorted(unknown)} in edition '{edition['name']}'.")
+    if not config["editions"]:
+        raise ValueError("Invalid configuration: 'editions' must not be empty.")
+
+def load_editions(editions_path=EDITIONS_CONFIG_PATH):
+    """
+    Load the editions file and the stage configurations of every edition.
+    Returns a list of {"name", "configs": {stage: config}}; 'delivery' is only present when configured.
+    """
+    from src.agent1_search.config import load_config as load_scraping
+    from src.agent2_select.config import load_config as load_selection
+    from src.agent3_redact.config import load_config as load_redaction
+    from src.agent4_design.config import load_config as load_design
+    from src.agent5_deliver.config import load_config as load_delivery
+
+    loaders = {"scraping": load_scraping, "selection": load_selection, "redaction": load_redaction,
+               "design": load_design, "delivery": load_delivery}
+    editions = []
+    for edition in load_settings(editions_path, validate_editions)["editions"]:
+        config_paths = dict(DEFAULT_CONFIGS)
+        config_paths.update({stage: get_full_path(file) for stage, file in edition["configs"].items()})
+        configs = {stage: loaders[stage](config_path) for stage, config_path in config_paths.items()}
+        editions.append({"name": edition["name"], "configs": configs})
+
+    # Outputs are looked up per directory, two editions writing to one folder would read each other's files
+    for stage in SEPARATE_OUTPUTS:
+        outputs = {}
+        for edition in editions:
+            if stage not in edition["configs"]:
+                continue
+            output = path.normcase(path.abspath(get_full_path(edition["configs"][stage]["paths"]["output"])))
+            if output in outputs:
+                raise ValueError(f"Invalid configuration: editions '{outputs[output]}' and '{edition['name']}' "
+                                 f"share the {stage} output directory.")
+            outputs[output] = edition["name"]
+    return editions
+
+class MultiEditionPipeline:
+    """
+    Produce several editions in one run. Sites are scraped once in a single browser session,
+    summarization models are loaded once per model set, and an article selected by several
+    editions is summarized once. Selection, design and delivery stay per edition.
+    """
+    def __init__(self, editions, log_path):
+        from src.agent1_search import NewsScraper
+        from src.agent2_select import NewsSelector
+        from src.agent3_redact import NewsRedactor
+        from src.agent4_design import NewsDesigner
+
+        self.editions = editions
+        self.logs = log_path
+
+        self.scrapers = {}
+        self.selectors = {}
+        self.redactors = {}
+        self.designers = {}
+        models = {}
+        for edition in editions:
+            name, configs = edition["name"], edition["configs"]
+            self.scrapers[name] = NewsScraper(log_path=log_path, config=configs["scraping"])
+            self.selectors[name] = NewsSelector(log_path=log_path, config=configs["selection"])
+            self.designers[name] = NewsDesigner(log_path=log_path, config=configs["design"])
+
+            # Editions with the same models share one loaded redactor
+            redaction = configs["redaction"]
+            model_set = (redaction["summarization_model"], redaction["translator_model"], redaction.get("device", "cuda"))
+            redactor = NewsRedactor(log_path=log_path, config=redaction, load_models=model_set not in models)
+            if model_set in models:
+                redactor.share_models(models[model_set])
+            else:
+                models[model_set] = redactor
+            self.redactors[name] = redactor
+        log_message(f"Loaded {len(models)} model set(s) for {len(editions)} editions.", self.logs)
+
+    def shared_sites(self):
+        """
+        Merge the sites of every edition. Returns [(site, {edition: site name})] in first-seen order.
+        """
+        sites = {}
+        for edition in self.editions:
+            for site in edition["configs"]["scraping"]["sites"]:
+                key = tuple(site.get(field) for field in SITE_KEY)
+                if key not in sites:
+                    sites[key] = (site, {})
+                sites[key][1][edition["name"]] = site["name"]
+        return list(sites.values())
+
+    def scrape(self):
+        """
+        Scrape every distinct site once and return the scraped news of each edition.
+        """
+        # The first edition's request settings are used for the shared scrape
+        scraper = self.scrapers[self.editions[0]["name"]]
+        scraped = {edition["name"]: [] for edition in self.editions}
+        sites = self.shared_sites()
+        log_message(f"Scraping {len(sites)} distinct sites for {len(self.editions)} editions...", self.logs)
+
+        with scraper.browser_session():
+            for idx, (site, names) in enumerate(sites):
+                if scraper.out_of_budget([site for site, _ in sites[idx:]]):
+                    break
+                log_message(f"Scraping {site['name']}...", self.logs, stage="search", site=site["name"])
+                news = list(scraper.iter_site_news(site))
+                for edition, site_name in names.items():
+                    scraped[edition].extend(dict(item, source=site_name) for item in news)
+        return scraped
+
+    def run_edition(self, name, scraped_news):
+        """
+        Select, redact and design one edition from its share of the scraped news.
+        """
+        self.scrapers[name].save_scraped_news(scraped_news)
+
+        selector = self.selectors[name]
+        cleaned_news = selector.clean_news([dict(news) for news in scraped_news])
+        final_selection = selector.select_top_news(selector.categorize_news(cleaned_news))
+        selector.save_selected_news(final_selection)
+
+        redactor = self.redactors[name]
+        with tracer.span("stage.redact", edition=name):
+            newsletter_content = redactor.redact_newsletter(final_selection)
+        redactor.save_newsletter(newsletter_content)
+
+        designer = self.designers[name]
+        with tracer.span("design.render", edition=name):
+            formatted_html = designer.generate_html(newsletter_content)
+        tracer.count("bytes", len(formatted_html.encode("utf-8")), stage="design")
+        designer.save_Newsletter(formatted_html)
+
+    def deliver(self, edition):
+        """
+        Deliver an edition with its own delivery configuration.
+        """
+        # Imported here as smtplib and ssl are only needed when delivering
+        from src.agent5_deliver import NewsDeliverer
+
+        with tracer.span("stage.deliver", edition=edition["name"]):
+            NewsDeliverer(log_path=self.logs, config=edition["configs"]["delivery"]).run_deliverer()
+
+    def run(self, deliver=True):
+        """
+        Run every edition. A failing edition is logged and does not stop the others.
+        Returns the names of the editions that failed.
+        """
+        deadline.start_stage("search")
+        with tracer.span("stage.search"):
+            scraped = self.scrape()
+        tracer.sample_memory()
+
+        # Redaction of every edition shares one budget
+        deadline.start_stage("redact")
+
+        failed = []
+        for edition in self.editions:
+            name = edition["name"]
+            try:
+                log_message(f"Producing edition {name}...", self.logs, edition=name)
+                self.run_edition(name, scraped[name])
+                if deliver and "delivery" in edition["configs"]:
+                    self.deliver(edition)
+                log_message(f"Edition {name} completed successfully.", self.logs, edition=name)
+            except Exception as e:
+                log_message(f"Error in edition {name}: {e}", self.logs, log_level="ERROR", edition=name)
+                failed.append(name)
+
+        summaries = {id(redactor.summary_cache): len(redactor.summary_cache) for redactor in self.redactors.values()}
+        log_message(f"Summarized {sum(summaries.values())} distinct articles for {len(self.editions)} editions.",
+                    self.logs)
+        tracer.sample_memory()
+        return failed
@@ -0,0 +1,263 @@
+import sqlite3
+from os import makedirs, path
+from json import dumps, loads
+from time import time, sleep
+from contextlib import contextmanager
+from src.agent0_config.config import load_config as load_init_config
+from src.common.path import get_full_path
+
+# Job states: waiting to be leased, held by a worker, finished, or given up after too many attempts
+QUEUED, LEASED, DONE, DEAD = "queued", "leased", "done", "dead"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_until REAL,
+    worker TEXT,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, kind, available_at);
+CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch, status);
+"""
+
+class JobTimeout(Exception):
+    """
+    Raised when the jobs of a batch do not finish within the wait timeout.
+    """
+
+class JobQueue:
+    """
+    Durable job queue stored in SQLite, shared by the orchestrator and any number of worker processes.
+    A worker leases a job for a visibility timeout; if it does not complete or renew the lease in time,
+    the job becomes available again. Failed jobs are retried with exponential backoff and moved to
+    the dead state after max_attempts.
+    """
+    def __init__(self, db_path, lease_seconds=300, max_attempts=3, backoff=5, journal_mode="wal"):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.journal_mode = journal_mode
+
+        makedirs(path.dirname(db_path), exist_ok=True)
+        with self.connection() as db:
+            db.execute(f"PRAGMA journal_mode={journal_mode}")
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def connection(self):
+        """
+        Open a short-lived connection. Each call has its own, so leases can be renewed from other threads.
+        """
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run statements in a write transaction, taking the database lock up front so concurrent
+        workers cannot lease the same job.
+        """
+        with self.connection() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, batch, kind, payloads):
+        """
+        Add one job per payload to a batch. Returns the job ids in order.
+        """
+        now = time()
+        with self.transaction() as db:
+            return [
+                db.execute(
+                    "INSERT INTO jobs (batch, kind, payload, status, available_at, created, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) RETURNING id",
+                    (batch, kind, dumps(payload, ensure_ascii=False), QUEUED, now, now, now)
+                ).fetchone()["id"]
+                for payload in payloads
+            ]
+
+    def lease(self, kinds, worker):
+        """
+        Lease the oldest available job of the given kinds, including jobs whose previous lease expired.
+        Returns the job as a dict, or None if there is nothing to do.
+        """
+        now = time()
+        marks = ", ".join("?" for _ in kinds)
+        with self.transaction() as db:
+            # Jobs whose worker disappeared on their last attempt are not retried again
+            db.execute(
+                "UPDATE jobs SET status = ?, error = 'lease expired', updated = ? "
+                "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (DEAD, now, LEASED, now, self.max_attempts)
+            )
+            row = db.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, lease_until = ?, updated = ? "
+                f"WHERE id = (SELECT id FROM jobs WHERE kind IN ({marks}) AND "
+                "((status = ? AND available_at <= ?) OR (status = ? AND lease_until < ?)) ORDER BY id LIMIT 1) "
+                "RETURNING id, batch, kind, payload, attempts",
+                (LEASED, worker, now + self.lease_seconds, now, *kinds, QUEUED, now, LEASED, now)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"id": row["id"], "batch": row["batch"], "kind": row["kind"],
+                "payload": loads(row["payload"]), "attempts": row["attempts"]}
+
+    def heartbeat(self, job_id, worker):
+        """
+        Extend the lease of a job still held by the worker. Returns False if the lease was lost.
+        """
+        with self.transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET lease_until = ?, updated = ? WHERE id = ? AND status = ? AND worker = ?",
+                (time() + self.lease_seconds, time(), job_id, LEASED, worker)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker, result):
+        """
+        Store the result of a job. Ignored if the lease expired and another worker took the job over.
+        """
+        with self.transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = ?, result = ?, lease_until = NULL, updated = ? "
+                "WHERE id = ? AND status = ? AND worker = ?",
+                (DONE, dumps(result, ensure_ascii=False), time(), job_id, LEASED, worker)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id, worker, error):
+        """
+        Record a failed attempt. The job is retried after a backoff, or dead-lettered after max_attempts.
+        """
+        now = time()
+        with self.transaction() as db:
+            row = db.execute("SELECT attempts FROM jobs WHERE id = ? AND status = ? AND worker = ?",
+                             (job_id, LEASED, worker)).fetchone()
+            if row is None:
+                return None
+            status = DEAD if row["attempts"] >= self.max_attempts else QUEUED
+            db.execute(
+                "UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_until = NULL, updated = ? WHERE id = ?",
+                (status, str(error), now + self.backoff * 2 ** (row["attempts"] - 1), now, job_id)
+            )
+            return status
+
+    def pending(self, kinds):
+        """
+        Count the jobs of the given kinds that are not finished, including those waiting out a backoff.
+        """
+        marks = ", ".join("?" for _ in kinds)
+        with self.connection() as db:
+            return db.execute(f"SELECT COUNT(*) FROM jobs WHERE kind IN ({marks}) AND status IN (?, ?)",
+                              (*kinds, QUEUED, LEASED)).fetchone()[0]
+
+    def counts(self, batch):
+        """
+        Return the number of jobs of a batch in each state.
+        """
+        with self.connection() as db:
+            rows = db.execute("SELECT status, COUNT(*) AS total FROM jobs WHERE batch = ? GROUP BY status",
+                              (batch,)).fetchall()
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, DEAD: 0}
+        counts.update({row["status"]: row["total"] for row in rows})
+        return counts
+
+    def wait(self, batch, poll_interval=1.0, timeout=None, progress=None):
+        """
+        Block until every job of a batch is done or dead. Calls progress(counts) after every poll,
+        which may raise to stop waiting.
+        """
+        deadline = None if timeout is None else time() + timeout
+        while True:
+            counts = self.counts(batch)
+            if progress is not None:
+                progress(counts)
+            if counts[QUEUED] == 0 and counts[LEASED] == 0:
+                return counts
+            if deadline is not None and time() > deadline:
+                raise JobTimeout(f"Batch {batch} did not finish in {timeout} seconds: {counts}")
+            sleep(poll_interval)
+
+    def results(self, batch):
+        """
+        Return the jobs of a batch in enqueue order, as dicts with their payload, status, result and error.
+        """
+        with self.connection() as db:
+            rows = db.execute("SELECT id, kind, payload, status, result, error FROM jobs WHERE batch = ? ORDER BY id",
+                              (batch,)).fetchall()
+        return [{
+            "id": row["id"],
+            "kind": row["kind"],
+            "payload": loads(row["payload"]),
+            "status": row["status"],
+            "result": loads(row["result"]) if row["result"] is not None else None,
+            "error": row["error"]
+        } for row in rows]
+
+    def cancel(self, batch, reason):
+        """
+        Dead-letter the jobs of a batch that have not finished, so workers stop picking them up.
+        A job already running finishes, but its result is discarded. Returns how many were cancelled.
+        """
+        with self.transaction() as db:
+            return db.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_until = NULL, updated = ? WHERE batch = ? AND status IN (?, ?)",
+                (DEAD, reason, time(), batch, QUEUED, LEASED)
+            ).rowcount
+
+    def requeue_dead(self, batch=None):
+        """
+        Give dead-lettered jobs a fresh set of attempts. Returns how many were requeued.
+        """
+        query = "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated = ? WHERE status = ?"
+        params = [QUEUED, time(), time(), DEAD]
+        if batch is not None:
+            query += " AND batch = ?"
+            params.append(batch)
+        with self.transaction() as db:
+            return db.execute(query, params).rowcount
+
+def jobs_settings():
+    """
+    Return the job queue settings of config.json, with their defaults.
+    """
+    settings = {
+        "database": "data\\jobs\\jobs.db",
+        "lease_seconds": 300,
+        "max_attempts": 3,
+        "backoff": 5,
+        "journal_mode": "wal",
+        "poll_interval": 1.0,
+        "wait_timeout": None,
+        "local_workers": 0
+    }
+    settings.update(load_init_config().get("jobs", {}))
+    return settings
+
+def open_queue(settings=None):
+    """
+    Open the job queue configured in config.json.
+    """
+    settings = settings or jobs_settings()
+    return JobQueue(get_full_path(settings["database"]), lease_seconds=settings["lease_seconds"],
+                    max_attempts=settings["max_attempts"], backoff=settings["backoff"],
+                    journal_mode=settings["journal_mode"])
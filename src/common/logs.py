@@ -1,27 +1,189 @@
 from os import makedirs, path
+from sys import stdout
+from json import dumps
+from time import time
+from queue import SimpleQueue, Empty
+from threading import Thread, Event, Lock
+from atexit import register
 from datetime import datetime
 from src.common.path import BASE_DIR
 
-def log_message(message, log_file, logging=True, log_level="INFO"):
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+LOG_FORMATS = {"text": ".log", "jsonl": ".jsonl"}
+
+# Process-wide settings, overridden by configure_logging
+settings = {"level": LOG_LEVELS["INFO"], "format": "text", "console": True}
+
+# Command telling the writer thread to close its handles, so the next records reopen their files
+REOPEN = object()
+
+class LogWriter:
+    """
+    Background thread that owns every open log file. Callers only enqueue records, so
+    formatting, file writes and console output never run inside the pipeline loops.
+    """
+    def __init__(self, logs_dir):
+        self.logs_dir = logs_dir
+        self.records = SimpleQueue()
+        self.handles = {}
+        self.thread = None
+        self.closed = False
+        self.lock = Lock()
+
+    def start(self):
+        """
+        Start the writer thread on first use.
+        """
+        with self.lock:
+            if self.thread is None and not self.closed:
+                makedirs(self.logs_dir, exist_ok=True)
+                self.thread = Thread(target=self.run, name="log-writer", daemon=True)
+                self.thread.start()
+
+    def put(self, record):
+        if self.closed:
+            # Logging after shutdown falls back to a synchronous write
+            self.write(record)
+            self.flush()
+            return
+        if self.thread is None:
+            self.start()
+        self.records.put(record)
+
+    def format(self, record):
+        """
+        Render a record as the console line and the file line for the configured format.
+        """
+        created, log_level, message, _, _, fields = record
+        timestamp = datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M:%S")
+        text = f"{timestamp} [{log_level}] {message}"
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+
+        if settings["format"] == "jsonl":
+            entry = {"time": timestamp, "level": log_level, "message": str(message)}
+            entry.update(fields)
+            return text, dumps(entry, ensure_ascii=False, default=str)
+        return text, text
+
+    def handle(self, log_file):
+        """
+        Return the open append handle of a log file, opening it on first use.
+        """
+        log_f = self.handles.get(log_file)
+        if log_f is None:
+            makedirs(self.logs_dir, exist_ok=True)
+            extension = LOG_FORMATS[settings["format"]]
+            log_f = open(path.join(self.logs_dir, f"{log_file}{extension}"), "a", encoding="utf-8",
+                         buffering=1 << 16)
+            self.handles[log_file] = log_f
+        return log_f
+
+    def write(self, record):
+        _, _, _, log_file, logging, _ = record
+        text, line = self.format(record)
+        if logging:
+            try:
+                self.handle(log_file).write(f"{line}\n")
+            except Exception as e:
+                print(f"Failed to write to log file: {e}")
+        if settings["console"]:
+            print(text)
+
+    def flush(self):
+        for log_f in self.handles.values():
+            log_f.flush()
+        stdout.flush()
+
+    def run(self):
+        """
+        Drain the queue, writing records in batches and flushing once the queue is empty.
+        """
+        while True:
+            record = self.records.get()
+            while True:
+                if record is None:
+                    self.flush()
+                    return
+                if isinstance(record, Event):
+                    self.flush()
+                    record.set()
+                elif record is REOPEN:
+                    self.close_handles()
+                else:
+                    self.write(record)
+                try:
+                    record = self.records.get_nowait()
+                except Empty:
+                    break
+            self.flush()
+
+    def sync(self, timeout=5):
+        """
+        Block until every record queued so far has been written and flushed.
+        """
+        if self.thread is None or self.closed:
+            return
+        done = Event()
+        self.records.put(done)
+        done.wait(timeout)
+
+    def reopen(self):
+        """
+        Close every handle once the records queued so far are written. The handles belong to the
+        writer thread, so the command goes through its queue like every record.
+        """
+        if self.thread is None or self.closed:
+            self.close_handles()
+            return
+        self.sync()
+        self.records.put(REOPEN)
+
+    def close_handles(self):
+        for log_f in self.handles.values():
+            log_f.close()
+        self.handles = {}
+
+    def close(self):
+        """
+        Stop the writer thread and close every handle.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        if self.thread is not None:
+            self.records.put(None)
+            self.thread.join(timeout=5)
+        self.close_handles()
+
+writer = LogWriter(path.join(BASE_DIR, "logs"))
+register(writer.close)
+
+def configure_logging(level="INFO", log_format="text", console=True):
+    """
+    Set the minimum level, the file format ('text' or 'jsonl') and console output for the process.
+    """
+    if level not in LOG_LEVELS:
+        raise ValueError(f"Invalid log level: {level}")
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Invalid log format: {log_format}")
+    if log_format != settings["format"]:
+        # Handles are reopened with the new extension
+        writer.reopen()
+    settings.update({"level": LOG_LEVELS[level], "format": log_format, "console": console})
+
+def flush_logs():
+    """
+    Wait until all queued log records are on disk.
+    """
+    writer.sync()
+
+def log_message(message, log_file, logging=True, log_level="INFO", **fields):
     """
     Enhanced logging utility for debugging and tracking operations.
+    Structured fields such as stage, site or article are attached to the record.
     """
-    # Ensure the logs directory exists
-    logs_dir = path.join(BASE_DIR, "logs")
-    makedirs(logs_dir, exist_ok=True)
-
-    # Format the log entry
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_entry = f"{timestamp} [{log_level}] {message}"
-
-    # Log to the file if enabled
-    if logging:
-        try:
-            log_file_path = path.join(logs_dir, f"{log_file}.log")
-            with open(log_file_path, "a", encoding="utf-8") as log_f:
-                log_f.write(f"{log_entry}\n")
-        except Exception as e:
-            print(f"Failed to write to log file: {e}")
-
-    # Print the log message to the console
-    print(log_entry)
\ No newline at end of file
+    if LOG_LEVELS.get(log_level, LOG_LEVELS["INFO"]) < settings["level"]:
+        return
+    writer.put((time(), log_level, message, log_file, logging, fields))
\ No newline at end of file
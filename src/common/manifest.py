@@ -0,0 +1,92 @@
+from os import makedirs, path, replace
+from json import load, dump, JSONDecodeError
+from hashlib import sha256
+from datetime import datetime
+
+def hash_file(file_path, chunk_size=1 << 20):
+    """
+    Compute the SHA-256 digest of a file, or None if it does not exist.
+    """
+    if not file_path or not path.exists(file_path):
+        return None
+    digest = sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class RunManifest:
+    """
+    Record of the inputs, configuration and output hashes of every stage of a run.
+    A stage whose inputs and configuration are unchanged, and whose output is still on disk,
+    does not need to run again.
+    """
+    def __init__(self, manifest_dir, run_id):
+        makedirs(manifest_dir, exist_ok=True)
+        self.manifest_file = path.join(manifest_dir, f"manifest_{run_id}.json")
+        self.data = {"run_id": run_id, "stages": {}}
+
+        if path.exists(self.manifest_file):
+            try:
+                with open(self.manifest_file, "r", encoding="utf-8") as f:
+                    self.data = load(f)
+            except (JSONDecodeError, OSError):
+                # A corrupt manifest only means every stage is considered stale
+                pass
+
+    def fingerprint(self, config_path, inputs):
+        """
+        Hash the configuration file and the input files of a stage.
+        """
+        return {
+            "config": {"path": config_path, "hash": hash_file(config_path)},
+            "inputs": {input_path: hash_file(input_path) for input_path in inputs}
+        }
+
+    def is_fresh(self, stage, config_path, inputs):
+        """
+        Check whether a stage completed with the same inputs and configuration and its output is intact.
+        """
+        entry = self.data["stages"].get(stage)
+        if not entry or entry.get("status") != "completed":
+            return False
+        if any(digest is None for digest in entry["inputs"].values()):
+            return False
+        if entry["config"] != self.fingerprint(config_path, [])["config"]:
+            return False
+        if entry["inputs"] != self.fingerprint(config_path, inputs)["inputs"]:
+            return False
+
+        output = entry.get("output") or {}
+        return output.get("hash") is not None and hash_file(output.get("path")) == output["hash"]
+
+    def output(self, stage):
+        """
+        Return the output path recorded for a stage.
+        """
+        entry = self.data["stages"].get(stage) or {}
+        return (entry.get("output") or {}).get("path")
+
+    def record(self, stage, status, config_path, inputs, output=None, error=None):
+        """
+        Record the outcome of a stage and persist the manifest.
+        """
+        entry = self.fingerprint(config_path, inputs)
+        entry.update({
+            "status": status,
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "output": {"path": output, "hash": hash_file(output)} if output else None
+        })
+        if error is not None:
+            entry["error"] = str(error)
+        self.data["stages"][stage] = entry
+        self.save()
+
+    def save(self):
+        """
+        Write the manifest atomically, so a crash never leaves it half written.
+        """
+        tmp_file = f"{self.manifest_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            dump(self.data, f, ensure_ascii=False, indent=4)
+        replace(tmp_file, self.manifest_file)
\ No newline at end of file
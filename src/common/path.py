@@ -32,4 +32,6 @@ INIT_CONFIG_PATH = path.join(CONFIG_PATH, "config.json")
 SCRP_CONFIG_PATH = path.join(CONFIG_PATH, "scraping_config.json")
 SLCT_CONFIG_PATH = path.join(CONFIG_PATH, "selection_config.json")
 RDCT_CONFIG_PATH = path.join(CONFIG_PATH, "redaction_config.json")
-DSGN_CONFIG_PATH = path.join(CONFIG_PATH, "design_config.json")
\ No newline at end of file
+DSGN_CONFIG_PATH = path.join(CONFIG_PATH, "design_config.json")
+DLVR_CONFIG_PATH = path.join(CONFIG_PATH, "delivery_config.json")
+EDITIONS_CONFIG_PATH = path.join(CONFIG_PATH, "editions_config.json")
\ No newline at end of file
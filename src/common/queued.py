@@ -0,0 +1,162 @@
+from sys import executable
+from subprocess import Popen
+from datetime import datetime
+from src.common.deadline import deadline
+from src.common.jobs import QUEUED, LEASED, DONE, DEAD, JobTimeout
+from src.common.logs import log_message
+from src.common.path import BASE_DIR
+from src.common.tracing import tracer
+from src.common.worker import SCRAPE_ARTICLE, SUMMARIZE
+
+class QueuedPipeline:
+    """
+    Run Agents 1 to 4 with article scraping and summarization spread over worker processes
+    through the job queue. Link discovery, selection and design stay in this process, which
+    waits for each batch of jobs before moving on.
+    """
+    def __init__(self, scraper, selector, redactor, designer, queue, log_path, settings):
+        self.scraper = scraper
+        self.selector = selector
+        self.redactor = redactor
+        self.designer = designer
+        self.queue = queue
+        self.logs = log_path
+        self.settings = settings
+        self.run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+
+    def start_workers(self, kind):
+        """
+        Start the configured number of local burst workers for a batch. Remote or long-running
+        workers pick up jobs from the same queue regardless.
+        """
+        return [
+            Popen([executable, "-m", "src.common.worker", "--burst", "--kinds", kind], cwd=BASE_DIR)
+            for _ in range(self.settings["local_workers"])
+        ]
+
+    def run_batch(self, kind, payloads, stage):
+        """
+        Enqueue one job per payload, wait until all are done or dead-lettered, and return the jobs in order.
+        If the wait timeout or the stage's budget runs out first, the unfinished jobs are cancelled.
+        If every local worker exits while jobs are still unfinished, they are cancelled and RuntimeError is raised.
+        """
+        batch = f"{self.run_id}_{kind}"
+        self.queue.enqueue(batch, kind, payloads)
+        log_message(f"Enqueued {len(payloads)} {kind} jobs in batch {batch}", self.logs, stage=kind)
+
+        timeout = min(self.settings["wait_timeout"] or float("inf"), deadline.stage_remaining(stage))
+        workers = self.start_workers(kind)
+        last = {}
+        def progress(counts):
+            if counts != last:
+                log_message(f"Batch {batch}: {counts}", self.logs, log_level="DEBUG", stage=kind)
+                last.update(counts)
+            # Burst workers only exit once nothing is pending, so all of them gone early means they crashed
+            if workers and counts[QUEUED] + counts[LEASED] and all(worker.poll() is not None for worker in workers):
+                cancelled = self.queue.cancel(batch, "every local worker exited")
+                codes = [worker.returncode for worker in workers]
+                raise RuntimeError(f"Every local {kind} worker exited (codes {codes}), "
+                                   f"cancelled {cancelled} unfinished jobs in batch {batch}")
+        try:
+            with tracer.span(f"queue.{kind}", jobs=len(payloads)):
+                self.queue.wait(batch, poll_interval=self.settings["poll_interval"],
+                                timeout=None if timeout == float("inf") else max(0.0, timeout), progress=progress)
+            for worker in workers:
+                worker.wait()
+        except JobTimeout:
+            cancelled = self.queue.cancel(batch, "out of time")
+            deadline.degrade(stage, f"cancelled {cancelled} unfinished {kind} jobs after waiting {timeout:.0f}s",
+                             self.logs, batch=batch)
+        finally:
+            # Also stops the workers when the wait is interrupted, so none is left orphaned
+            for worker in workers:
+                if worker.poll() is None:
+                    worker.terminate()
+                    worker.wait()
+
+        jobs = self.queue.results(batch)
+        dead = sum(1 for job in jobs if job["status"] == DEAD)
+        if dead:
+            log_message(f"{dead} {kind} jobs were dead-lettered in batch {batch}", self.logs,
+                        log_level="WARNING", stage=kind)
+        return jobs
+
+    def scrape(self):
+        """
+        Discover the articles of every site here and fetch the ones without full text through the workers.
+        """
+        deadline.start_stage("search")
+        payloads = []
+        feed_news = []
+        sites = self.scraper.config["sites"]
+        for idx, site in enumerate(sites):
+            if self.scraper.out_of_budget(sites[idx:]):
+                break
+            log_message(f"Listing {site['name']}...", self.logs, stage="search", site=site["name"])
+            try:
+                for entry in self.scraper.discover(site):
+                    if deadline.expired("search"):
+                        deadline.degrade("search", f"stopped discovering {site['name']}, the search budget is spent",
+                                         self.logs, site=site["name"])
+                        break
+                    # Feed entries with the full text need no rendering
+                    news = self.scraper.feed_news(site["name"], entry)
+                    if news:
+                        feed_news.append(news)
+                    else:
+                        payloads.append({"site": site["name"], "link": entry["link"]})
+            except Exception as e:
+                log_message(f"Error: Could not scrape {site['name']}: {e}", self.logs, log_level="ERROR",
+                            stage="search", site=site["name"])
+
+        jobs = self.run_batch(SCRAPE_ARTICLE, payloads, "search")
+        # Sites with articles left unscraped keep their previous discovery window
+        if self.scraper.state is not None:
+            for site_name in {job["payload"]["site"] for job in jobs if job["status"] != DONE}:
+                self.scraper.state.discard(site_name)
+        return feed_news + [job["result"] for job in jobs if job["status"] == DONE]
+
+    def summarize(self, final_selection):
+        """
+        Summarize the selected news through the workers and fill the redactor's summary cache,
+        so redact_newsletter only assembles the document.
+        """
+        payloads = [{"news": final_selection["Main"], "parameters": 30}] if final_selection.get("Main") else []
+        payloads.extend({"news": news, "parameters": 100}
+                        for news_list in final_selection["sections"].values() for news in news_list)
+
+        # Articles selected twice with the same length limit are summarized once
+        unique = {}
+        for payload in payloads:
+            unique.setdefault((payload["news"].get("link", ""), payload["parameters"]), payload)
+
+        jobs = self.run_batch(SUMMARIZE, list(unique.values()), "redact")
+        for job in jobs:
+            # News without a summary fall back to previous summaries or extracts in redact_newsletter
+            if job["status"] != DONE:
+                continue
+            key = (job["payload"]["news"].get("link", ""), job["payload"]["parameters"])
+            self.redactor.summary_cache[key] = job["result"]
+
+    def run(self):
+        """
+        Run the queued pipeline and write the same outputs as the file-based mode.
+        """
+        scraped = self.scrape()
+        log_message(f"Workers scraped {len(scraped)} news.", self.logs)
+        self.scraper.save_scraped_news(scraped)
+
+        cleaned_news = self.selector.clean_news(scraped)
+        final_selection = self.selector.select_top_news(self.selector.categorize_news(cleaned_news))
+        self.selector.save_selected_news(final_selection)
+
+        deadline.start_stage("redact")
+        self.summarize(final_selection)
+        newsletter_content = self.redactor.redact_newsletter(final_selection)
+        self.redactor.save_newsletter(newsletter_content)
+
+        deadline.start_stage("design")
+        with tracer.span("design.render"):
+            formatted_html = self.designer.generate_html(newsletter_content)
+        self.designer.save_Newsletter(formatted_html)
+        log_message("Queued pipeline complete.", self.logs)
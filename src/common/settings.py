@@ -0,0 +1,61 @@
+from os import path, stat
+from json import load, JSONDecodeError
+from copy import deepcopy
+from threading import Lock
+
+# Parsed and validated configurations keyed by path, with the (mtime, size) they were read at
+cache = {}
+cache_lock = Lock()
+
+def validate_schema(config, schema, optional=None):
+    """
+    Check that every required key exists with the expected type, and that optional keys
+    have the expected type when present. Schemas map a key to (types, description).
+    """
+    for key, (types, description) in schema.items():
+        if key not in config or not isinstance(config[key], types):
+            raise ValueError(f"Invalid configuration: '{key}' must be {description}.")
+    for key, (types, description) in (optional or {}).items():
+        if key in config and not isinstance(config[key], types):
+            raise ValueError(f"Invalid configuration: '{key}' must be {description}.")
+
+def load_settings(config_path, validate):
+    """
+    Load and validate a JSON configuration file once, returning a cached copy until the file changes on disk.
+    """
+    if not path.exists(config_path):
+        raise FileNotFoundError(f"Configuration file not found: {config_path}")
+
+    file_stat = stat(config_path)
+    version = (file_stat.st_mtime_ns, file_stat.st_size)
+    with cache_lock:
+        cached = cache.get(config_path)
+    if cached is None or cached[0] != version:
+        with open(config_path, "r", encoding="utf-8") as file:
+            try:
+                config = load(file)
+            except JSONDecodeError as e:
+                raise ValueError(f"Error decoding JSON configuration: {e}")
+        validate(config)
+        cached = (version, config)
+        with cache_lock:
+            cache[config_path] = cached
+
+    # Callers get their own copy so the cached configuration cannot be modified
+    return deepcopy(cached[1])
+
+def load_stage_settings(stages):
+    """
+    Load and validate the configuration files of the given stages up front, so a bad
+    configuration fails before any work starts. Returns the configurations by stage.
+    """
+    from src.agent0_config.config import load_config as load_init
+    from src.agent1_search.config import load_config as load_search
+    from src.agent2_select.config import load_config as load_select
+    from src.agent3_redact.config import load_config as load_redact
+    from src.agent4_design.config import load_config as load_design
+    from src.agent5_deliver.config import load_config as load_deliver
+
+    loaders = {"init": load_init, "search": load_search, "select": load_select, "redact": load_redact,
+               "design": load_design, "deliver": load_deliver}
+    return {stage: loaders[stage]() for stage in ["init"] + [s for s in stages if s != "init"]}
\ No newline at end of file
@@ -0,0 +1,269 @@
+from os import makedirs, path, listdir, replace
+from json import load, dump, loads, dumps, JSONDecodeError
+from struct import pack, unpack
+from zlib import compress as zlib_compress, decompress as zlib_decompress
+from datetime import datetime
+from src.agent0_config.config import load_config as load_init_config
+from src.common.path import get_full_path
+
+try:
+    from zstandard import ZstdCompressor, ZstdDecompressor
+except ImportError:
+    ZstdCompressor = ZstdDecompressor = None
+
+# Record files: magic, header length, JSON header with the record index, then one compressed block per record
+RECORDS_MAGIC = b"NLR1"
+RECORDS_EXTENSION = ".nlr"
+JSON_EXTENSION = ".json"
+
+CODECS = ("zstd", "zlib", "none")
+
+def default_codec():
+    return "zstd" if ZstdCompressor is not None else "zlib"
+
+def compressor(codec):
+    """
+    Return the block compression function of a codec, built once per file.
+    """
+    if codec == "zstd":
+        if ZstdCompressor is None:
+            raise ImportError("The 'zstandard' package is required to write zstd records files.")
+        return ZstdCompressor(level=3).compress
+    if codec == "zlib":
+        return lambda data: zlib_compress(data, 1)
+    return bytes
+
+def decompressor(codec):
+    """
+    Return the block decompression function of a codec, built once per file.
+    """
+    if codec == "zstd":
+        if ZstdDecompressor is None:
+            raise ImportError("The 'zstandard' package is required to read zstd records files.")
+        return ZstdDecompressor().decompress
+    if codec == "zlib":
+        return zlib_decompress
+    return bytes
+
+def flatten(data):
+    """
+    Split a stage document into addressable records: list items by position, dict values by key
+    and dicts of lists such as 'sections' by 'key/subkey'.
+    """
+    if isinstance(data, list):
+        return "list", [], [(str(idx), item) for idx, item in enumerate(data)]
+
+    nested = []
+    records = []
+    for key, value in data.items():
+        if isinstance(value, dict) and all(isinstance(item, list) for item in value.values()):
+            nested.append(key)
+            records.extend((f"{key}/{subkey}", subvalue) for subkey, subvalue in value.items())
+        else:
+            records.append((key, value))
+    return "dict", nested, records
+
+def write_records(file_path, data, codec=None):
+    """
+    Write a stage document as an indexed records file. The file is replaced atomically, so a
+    crash never leaves a truncated output for the next stage.
+    """
+    codec = codec or default_codec()
+    compress = compressor(codec)
+    kind, nested, records = flatten(data)
+
+    blocks = []
+    index = []
+    offset = 0
+    for key, value in records:
+        block = compress(dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        index.append([key, offset, len(block)])
+        blocks.append(block)
+        offset += len(block)
+
+    header = dumps({"kind": kind, "codec": codec, "nested": nested, "index": index},
+                   separators=(",", ":")).encode("utf-8")
+    tmp_file = f"{file_path}.tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(RECORDS_MAGIC + pack("<I", len(header)) + header)
+        for block in blocks:
+            f.write(block)
+    replace(tmp_file, file_path)
+
+def read_header(f):
+    if f.read(4) != RECORDS_MAGIC:
+        raise ValueError(f"Not a records file: {f.name}")
+    (header_length,) = unpack("<I", f.read(4))
+    return loads(f.read(header_length)), 8 + header_length
+
+def read_index(file_path):
+    """
+    Return the keys stored in a records file without reading any record.
+    """
+    with open(file_path, "rb") as f:
+        header, _ = read_header(f)
+    return [key for key, _, _ in header["index"]]
+
+def read_record(file_path, key):
+    """
+    Read a single record, such as one article or one section, by its key.
+    """
+    with open(file_path, "rb") as f:
+        header, data_start = read_header(f)
+        for record_key, offset, length in header["index"]:
+            if record_key == key:
+                f.seek(data_start + offset)
+                return loads(decompressor(header["codec"])(f.read(length)))
+    raise KeyError(key)
+
+def read_records(file_path):
+    """
+    Read a whole records file back into the original stage document.
+    """
+    with open(file_path, "rb") as f:
+        header, _ = read_header(f)
+        blobs = f.read()
+
+    decompress = decompressor(header["codec"])
+    records = [(key, loads(decompress(blobs[offset:offset + length])))
+               for key, offset, length in header["index"]]
+    if header["kind"] == "list":
+        return [value for _, value in records]
+
+    data = {key: {} for key in header["nested"]}
+    for key, value in records:
+        parent, _, child = key.partition("/")
+        if parent in header["nested"] and child:
+            data[parent][child] = value
+        else:
+            data[key] = value
+    return data
+
+class RunCatalog:
+    """
+    Index of the files written by each stage, replacing directory listings to find the latest run.
+    """
+    def __init__(self, catalog_path, history=30):
+        self.catalog_path = catalog_path
+        self.history = history
+
+    def load(self):
+        if not path.exists(self.catalog_path):
+            return {}
+        try:
+            with open(self.catalog_path, "r", encoding="utf-8") as f:
+                return load(f)
+        except (JSONDecodeError, OSError):
+            return {}
+
+    def register(self, stage, file_path, file_format):
+        """
+        Record a new output of a stage. The catalog is rewritten atomically.
+        """
+        catalog = self.load()
+        entries = catalog.setdefault(stage, [])
+        entries[:] = [entry for entry in entries if entry["path"] != file_path]
+        entries.append({
+            "path": file_path,
+            "format": file_format,
+            "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+        del entries[:-self.history]
+
+        makedirs(path.dirname(self.catalog_path), exist_ok=True)
+        tmp_file = f"{self.catalog_path}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            dump(catalog, f, ensure_ascii=False, indent=4)
+        replace(tmp_file, self.catalog_path)
+
+    def latest(self, stage, directory=None):
+        """
+        Return the latest registered output of a stage that still exists, as (path, format).
+        With a directory, only outputs written there count, so editions with their own folders stay apart.
+        """
+        if directory is not None:
+            directory = path.normcase(path.abspath(directory))
+        for entry in reversed(self.load().get(stage, [])):
+            if directory is not None and path.normcase(path.abspath(path.dirname(entry["path"]))) != directory:
+                continue
+            if path.exists(entry["path"]):
+                return entry["path"], entry["format"]
+        return None, None
+
+def storage_settings():
+    """
+    Return the inter-stage storage settings of config.json: format, records codec and run catalog.
+    """
+    storage = load_init_config().get("storage", {})
+    catalog = RunCatalog(get_full_path(storage.get("catalog", "data\\catalog.json")))
+    return storage.get("format", "json"), storage.get("codec"), catalog
+
+def save_stage_output(stage, data, directory, prefix):
+    """
+    Save the output document of a stage in the configured format and register it in the run catalog.
+    """
+    file_format, codec, catalog = storage_settings()
+    date = datetime.now().strftime('%Y%m%d')
+    if file_format == "records":
+        output_file = path.join(directory, f"{prefix}_{date}{RECORDS_EXTENSION}")
+        write_records(output_file, data, codec=codec)
+    else:
+        output_file = path.join(directory, f"{prefix}_{date}{JSON_EXTENSION}")
+        tmp_file = f"{output_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            dump(data, f, indent=4, ensure_ascii=False)
+        replace(tmp_file, output_file)
+
+    catalog.register(stage, output_file, file_format)
+    return output_file
+
+def register_stage_output(stage, file_path, file_format):
+    """
+    Register a file written outside save_stage_output, such as the rendered Newsletter.
+    """
+    _, _, catalog = storage_settings()
+    catalog.register(stage, file_path, file_format)
+
+def find_stage_output(stage, directory, extensions=(JSON_EXTENSION, RECORDS_EXTENSION)):
+    """
+    Find the latest output of a stage through the run catalog, falling back to the newest
+    file name in the directory for outputs written before the catalog existed.
+    """
+    _, _, catalog = storage_settings()
+    file_path, file_format = catalog.latest(stage, directory)
+    if file_path:
+        return file_path, file_format
+
+    files = [f for f in listdir(directory) if f.endswith(extensions)]
+    if not files:
+        return None, None
+    latest_file = max(files)
+    return path.join(directory, latest_file), "records" if latest_file.endswith(RECORDS_EXTENSION) else "json"
+
+def load_stage_output(stage, directory):
+    """
+    Load the latest output document of a stage. Returns (data, path), or (None, None) if there is none.
+    """
+    file_path, file_format = find_stage_output(stage, directory)
+    if file_path is None:
+        return None, None
+    if file_format == "records":
+        return read_records(file_path), file_path
+    with open(file_path, "r", encoding="utf-8") as f:
+        return load(f), file_path
+
+def load_stage_record(stage, directory, key):
+    """
+    Load a single article or section from the latest output of a stage.
+    """
+    file_path, file_format = find_stage_output(stage, directory)
+    if file_path is None:
+        raise FileNotFoundError(f"No output found for stage '{stage}'.")
+    if file_format == "records":
+        return read_record(file_path, key)
+
+    data, _ = load_stage_output(stage, directory)
+    parent, _, child = key.partition("/")
+    if isinstance(data, list):
+        return data[int(key)]
+    return data[parent][child] if child else data[key]
\ No newline at end of file
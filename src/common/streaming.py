@@ -0,0 +1,226 @@
+from queue import Queue, Full, Empty
+from threading import Thread, Event, Lock
+from src.common.deadline import deadline
+from src.common.logs import log_message
+from src.common.tracing import tracer
+
+# Marker sent downstream when a stage has no more items
+DONE = object()
+
+class PipelineStopped(Exception):
+    """
+    Raised inside a stage when another stage failed and the pipeline is shutting down.
+    """
+
+class StreamingSelection:
+    """
+    Incremental equivalent of NewsSelector.categorize_news and select_top_news.
+    Each added news item reports the winner slots it entered, so redaction can start early.
+    """
+    def __init__(self, selector):
+        self.selector = selector
+        self.categories = selector.config["languages"]["en"]["content_blocks"]
+        self.score_threshold = selector.config["score_threshold"]
+        self.max_news_per_block = selector.config["max_news_per_block"]
+
+        self.main = []
+        self.highest_score = 0
+        self.uncategorized = []
+        self.sections = {category: [] for category in self.categories}
+        self.seen = set()
+        self.lock = Lock()
+
+    def add(self, news):
+        """
+        Clean, score and rank one news item. Returns the (slot, news) winner events it produced.
+        """
+        # Remove duplicates
+        dict_tuple = tuple(sorted(news.items()))
+        if dict_tuple in self.seen:
+            return []
+        self.seen.add(dict_tuple)
+
+        self.selector.clean_item(news)
+        best_category, score = self.selector.score_news(news, self.categories)
+
+        events = []
+        with self.lock:
+            # Get the main new for the Newsletter
+            if score > self.highest_score:
+                self.main = news
+                self.highest_score = score
+                events.append(("main", news))
+
+            if score < self.score_threshold:
+                self.uncategorized.append(news)
+                return events
+
+            # Keep each block sorted by score; ties keep arrival order as the batch sort does
+            ranked = self.sections[best_category]
+            position = len(ranked)
+            for idx, item in enumerate(ranked):
+                if item["score"] < score:
+                    position = idx
+                    break
+            if position < self.max_news_per_block:
+                ranked.insert(position, news)
+                del ranked[self.max_news_per_block:]
+                events.append(("section", news))
+
+        return events
+
+    def is_winner(self, slot, news):
+        """
+        Check whether a news item still holds a winner slot.
+        """
+        with self.lock:
+            if slot == "main":
+                return self.main is news
+            return any(item is news for items in self.sections.values() for item in items)
+
+    def result(self):
+        """
+        Return the selection in the same layout as NewsSelector.categorize_news.
+        """
+        with self.lock:
+            return {
+                "Main": self.main,
+                "Uncategorized": list(self.uncategorized),
+                "sections": {category: list(items) for category, items in self.sections.items()}
+            }
+
+class StreamingPipeline:
+    """
+    Run Agents 1 to 4 concurrently, connected by bounded in-memory queues.
+    Scraped articles flow into selection as they arrive, and articles entering a winner slot are
+    summarized right away. Full queues block the upstream stage, which keeps memory bounded.
+    """
+    def __init__(self, scraper, selector, redactor, designer, log_path, article_queue=32, redaction_queue=8):
+        self.scraper = scraper
+        self.selector = selector
+        self.redactor = redactor
+        self.designer = designer
+        self.logs = log_path
+
+        self.articles = Queue(maxsize=article_queue)
+        self.candidates = Queue(maxsize=redaction_queue)
+        self.stop = Event()
+        self.errors = []
+        self.scraped = []
+        self.selection = StreamingSelection(selector)
+
+    def put(self, queue, item):
+        """
+        Put an item on a bounded queue, giving up if the pipeline is stopping.
+        """
+        while True:
+            if self.stop.is_set():
+                raise PipelineStopped()
+            try:
+                queue.put(item, timeout=0.5)
+                return
+            except Full:
+                continue
+
+    def get(self, queue):
+        """
+        Get an item from a queue, giving up if the pipeline is stopping.
+        """
+        while True:
+            if self.stop.is_set():
+                raise PipelineStopped()
+            try:
+                return queue.get(timeout=0.5)
+            except Empty:
+                continue
+
+    def run_stage(self, name, target, output):
+        """
+        Run a producer stage, recording its error and always signalling the end downstream.
+        """
+        try:
+            target()
+        except PipelineStopped:
+            pass
+        except Exception as e:
+            log_message(f"Error in streaming stage {name}: {e}", self.logs, log_level="ERROR", stage=name)
+            self.errors.append(e)
+            self.stop.set()
+        finally:
+            try:
+                self.put(output, DONE)
+            except PipelineStopped:
+                pass
+
+    def scrape_stage(self):
+        for news in self.scraper.iter_news():
+            # Selection cleans items in place, the raw copy is kept for the scraped output
+            self.scraped.append(news)
+            self.put(self.articles, dict(news))
+
+    def select_stage(self):
+        while True:
+            news = self.get(self.articles)
+            if news is DONE:
+                return
+            for event in self.selection.add(news):
+                self.put(self.candidates, event)
+
+    def redact_stage(self):
+        """
+        Summarize winner candidates as they arrive. Runs on the calling thread, where the models were loaded.
+        """
+        while True:
+            item = self.get(self.candidates)
+            if item is DONE:
+                return
+            slot, news = item
+
+            # Skip candidates already pushed out of their slot by a better article
+            if not self.selection.is_winner(slot, news):
+                continue
+            self.redactor.format_news(news, parameters=30 if slot == "main" else 100)
+
+    def run(self):
+        """
+        Run the overlapped pipeline and write the same outputs as the file-based mode.
+        """
+        # Stages overlap, so only scraping gets its own share; redaction uses the run's budget until scraping ends
+        deadline.start_stage("search")
+        threads = [
+            Thread(target=self.run_stage, args=("search", self.scrape_stage, self.articles), daemon=True),
+            Thread(target=self.run_stage, args=("select", self.select_stage, self.candidates), daemon=True)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            self.redact_stage()
+        except PipelineStopped:
+            pass
+        except Exception:
+            self.stop.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+
+        if self.errors:
+            raise self.errors[0]
+
+        log_message(f"Streaming stages finished with {len(self.scraped)} scraped news.", self.logs)
+        self.scraper.save_scraped_news(self.scraped)
+
+        final_selection = self.selector.select_top_news(self.selection.result())
+        self.selector.save_selected_news(final_selection)
+
+        # Winners were summarized while streaming, the remaining ones are redacted now
+        deadline.start_stage("redact")
+        newsletter_content = self.redactor.redact_newsletter(final_selection)
+        self.redactor.save_newsletter(newsletter_content)
+
+        deadline.start_stage("design")
+        with tracer.span("design.render"):
+            formatted_html = self.designer.generate_html(newsletter_content)
+        self.designer.save_Newsletter(formatted_html)
+        log_message("Streaming pipeline complete.", self.logs)
\ No newline at end of file
@@ -0,0 +1,213 @@
+from os import makedirs, path, getpid
+from sys import platform
+from json import dump
+from time import perf_counter_ns
+from threading import Lock, get_ident
+from contextlib import contextmanager
+from collections import defaultdict
+from src.common.logs import log_message
+
+try:
+    from resource import getrusage, RUSAGE_SELF
+except ImportError:
+    getrusage = None
+
+try:
+    from psutil import Process
+except ImportError:
+    Process = None
+
+def peak_rss():
+    """
+    Return the peak resident set size of the process in bytes, or None if it cannot be measured.
+    """
+    if getrusage is not None:
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        return getrusage(RUSAGE_SELF).ru_maxrss * (1 if platform == "darwin" else 1024)
+    if Process is not None:
+        memory = Process().memory_info()
+        return getattr(memory, "peak_wset", memory.rss)
+    return None
+
+class Tracer:
+    """
+    Collects nested timing spans and counters for the pipeline, and exports them as a
+    Prometheus text file and a Chrome trace JSON (chrome://tracing or Perfetto).
+    """
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.durations = defaultdict(lambda: [0, 0])
+        self.counters = defaultdict(float)
+        self.peak_rss = 0
+        self.origin = perf_counter_ns()
+        self.lock = Lock()
+
+    def reset(self):
+        with self.lock:
+            self.events = []
+            self.durations.clear()
+            self.counters.clear()
+            self.peak_rss = 0
+            self.origin = perf_counter_ns()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        Time a block of code. Spans opened inside it on the same thread appear nested in the trace.
+        """
+        if not self.enabled:
+            yield
+            return
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = perf_counter_ns()
+            event = {
+                "name": name,
+                "cat": name.split(".", 1)[0],
+                "ph": "X",
+                "ts": (start - self.origin) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": getpid(),
+                "tid": get_ident()
+            }
+            if attrs:
+                event["args"] = {key: str(value) for key, value in attrs.items()}
+            with self.lock:
+                self.events.append(event)
+                duration = self.durations[name]
+                duration[0] += 1
+                duration[1] += end - start
+
+    def count(self, name, value=1, stage=None):
+        """
+        Add to a counter such as articles, tokens or bytes, optionally per stage.
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[(name, stage)] += value
+
+    def sample_memory(self):
+        """
+        Record the current peak RSS of the process.
+        """
+        rss = peak_rss()
+        if rss is not None:
+            self.peak_rss = max(self.peak_rss, rss)
+
+    def prometheus(self):
+        """
+        Render the collected metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP newsletter_span_seconds_total Total time spent in each traced span.",
+            "# TYPE newsletter_span_seconds_total counter"
+        ]
+        with self.lock:
+            durations = sorted(self.durations.items())
+            counters = sorted(self.counters.items(), key=lambda item: (item[0][0], item[0][1] or ""))
+        for name, (_, total) in durations:
+            lines.append(f'newsletter_span_seconds_total{{span="{name}"}} {total / 1e9:.6f}')
+        lines.extend([
+            "# HELP newsletter_span_calls_total Number of times each traced span ran.",
+            "# TYPE newsletter_span_calls_total counter"
+        ])
+        for name, (calls, _) in durations:
+            lines.append(f'newsletter_span_calls_total{{span="{name}"}} {calls}')
+
+        for counter in sorted({name for (name, _), _ in counters}):
+            lines.append(f"# TYPE newsletter_{counter}_total counter")
+            for (name, stage), value in counters:
+                if name == counter:
+                    labels = f'{{stage="{stage}"}}' if stage else ""
+                    lines.append(f"newsletter_{name}_total{labels} {value:g}")
+
+        self.sample_memory()
+        lines.extend([
+            "# HELP newsletter_peak_rss_bytes Peak resident set size of the pipeline process.",
+            "# TYPE newsletter_peak_rss_bytes gauge",
+            f"newsletter_peak_rss_bytes {self.peak_rss}"
+        ])
+        return "\n".join(lines) + "\n"
+
+    def export(self, output_dir, run_id):
+        """
+        Write the Prometheus metrics file and the Chrome trace of a run. Returns both paths.
+        """
+        makedirs(output_dir, exist_ok=True)
+        metrics_file = path.join(output_dir, f"metrics_{run_id}.prom")
+        trace_file = path.join(output_dir, f"trace_{run_id}.json")
+
+        with open(metrics_file, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        with self.lock:
+            events = list(self.events)
+        with open(trace_file, "w", encoding="utf-8") as f:
+            dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return metrics_file, trace_file
+
+tracer = Tracer()
+
+# Process-wide settings, overridden by configure_tracing
+settings = {"output": None, "profile": {}}
+
+def configure_tracing(enabled=False, output=None, profile=None):
+    """
+    Enable tracing, set where the metrics are written and which stages are profiled
+    ({stage: 'cprofile' | 'pyinstrument'}).
+    """
+    tracer.enabled = enabled
+    settings.update({"output": output, "profile": profile or {}})
+
+def export_tracing(run_id, log_file):
+    """
+    Export the metrics and trace of the run if tracing is enabled.
+    """
+    if not tracer.enabled or not settings["output"]:
+        return
+    metrics_file, trace_file = tracer.export(settings["output"], run_id)
+    log_message(f"Metrics saved to {metrics_file} and trace saved to {trace_file}", log_file)
+
+@contextmanager
+def profile_stage(stage, run_id, log_file):
+    """
+    Run a stage under the profiler configured for it, if any, and save the report next to the metrics.
+    """
+    profiler_name = settings["profile"].get(stage)
+    if not profiler_name or not settings["output"]:
+        yield
+        return
+
+    makedirs(settings["output"], exist_ok=True)
+    if profiler_name == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            log_message("pyinstrument is not installed, stage will not be profiled.", log_file, log_level="WARNING")
+            yield
+            return
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            report_file = path.join(settings["output"], f"profile_{stage}_{run_id}.html")
+            with open(report_file, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+            log_message(f"Profile of {stage} saved to {report_file}", log_file)
+        return
+
+    from cProfile import Profile
+    profiler = Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        report_file = path.join(settings["output"], f"profile_{stage}_{run_id}.prof")
+        profiler.dump_stats(report_file)
+        log_message(f"Profile of {stage} saved to {report_file}", log_file)
\ No newline at end of file
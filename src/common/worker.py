@@ -0,0 +1,126 @@
+from sys import argv, exit
+from os import getpid
+from socket import gethostname
+from time import sleep
+from threading import Thread, Event
+from contextlib import ExitStack
+from argparse import ArgumentParser
+from datetime import datetime
+from src.common.jobs import open_queue, jobs_settings
+from src.common.logs import log_message
+from src.common.tracing import tracer, export_tracing
+
+# Job kinds served by the workers
+SCRAPE_ARTICLE = "scrape_article"
+SUMMARIZE = "summarize"
+JOB_KINDS = [SCRAPE_ARTICLE, SUMMARIZE]
+
+class Worker:
+    """
+    Lease jobs from the queue and run them. Agents are created on the first job of their kind,
+    so a worker that only summarizes never starts a browser and one that only scrapes never loads models.
+    """
+    def __init__(self, queue, kinds, log_path, poll_interval=1.0):
+        self.queue = queue
+        self.kinds = kinds
+        self.logs = log_path
+        self.poll_interval = poll_interval
+        self.name = f"{gethostname()}:{getpid()}"
+
+        self.scraper = None
+        self.redactor = None
+        self.resources = ExitStack()
+
+    def scrape_article(self, payload):
+        if self.scraper is None:
+            from src.agent1_search import NewsScraper
+            self.scraper = NewsScraper(log_path=self.logs)
+            # One browser for every article this worker fetches
+            self.resources.enter_context(self.scraper.browser_session())
+        news = self.scraper.fetch_news(payload["site"], payload["link"])
+        # The scraper reports fetch errors in the content, a failed job is retried instead
+        if news["content"] == "Error fetching content":
+            raise RuntimeError(f"Could not fetch content from {payload['link']}")
+        return news
+
+    def summarize(self, payload):
+        if self.redactor is None:
+            from src.agent3_redact import NewsRedactor
+            self.redactor = NewsRedactor(log_path=self.logs)
+        # Failures are raised, not degraded, so the job is retried on another attempt
+        return self.redactor.summarize_news(payload["news"], parameters=payload["parameters"])
+
+    def keep_leased(self, job, done):
+        """
+        Renew the lease of a running job until it finishes, so long summaries are not taken over.
+        """
+        while not done.wait(self.queue.lease_seconds / 3):
+            if not self.queue.heartbeat(job["id"], self.name):
+                log_message(f"Lost the lease of job {job['id']}", self.logs, log_level="WARNING", job=job["id"])
+                return
+
+    def run_job(self, job):
+        handlers = {SCRAPE_ARTICLE: self.scrape_article, SUMMARIZE: self.summarize}
+        done = Event()
+        heartbeat = Thread(target=self.keep_leased, args=(job, done), daemon=True)
+        heartbeat.start()
+        try:
+            with tracer.span(f"job.{job['kind']}", job=job["id"]):
+                result = handlers[job["kind"]](job["payload"])
+        except Exception as e:
+            status = self.queue.fail(job["id"], self.name, e)
+            log_message(f"Job {job['id']} ({job['kind']}) failed on attempt {job['attempts']}: {e}", self.logs,
+                        log_level="ERROR" if status == "dead" else "WARNING", job=job["id"], status=status)
+            return
+        finally:
+            done.set()
+            heartbeat.join()
+        self.queue.complete(job["id"], self.name, result)
+        tracer.count("jobs", stage=job["kind"])
+
+    def run(self, burst=False, max_jobs=None):
+        """
+        Process jobs until stopped. With burst, return as soon as the queue has nothing available.
+        Returns the number of jobs run.
+        """
+        log_message(f"Worker {self.name} serving {', '.join(self.kinds)}", self.logs)
+        processed = 0
+        with self.resources:
+            while max_jobs is None or processed < max_jobs:
+                job = self.queue.lease(self.kinds, self.name)
+                if job is None:
+                    # Burst workers stay while jobs are still running elsewhere or waiting to be retried
+                    if burst and not self.queue.pending(self.kinds):
+                        break
+                    sleep(self.poll_interval)
+                    continue
+                self.run_job(job)
+                processed += 1
+        log_message(f"Worker {self.name} stopped after {processed} jobs", self.logs)
+        return processed
+
+def parse_args(arguments):
+    parser = ArgumentParser(description="Worker process for the newsletter job queue.")
+    parser.add_argument("--kinds", nargs="+", choices=JOB_KINDS, default=JOB_KINDS, help="Job kinds to serve.")
+    parser.add_argument("--burst", action="store_true", help="Exit once no job of the served kinds is left instead of waiting.")
+    parser.add_argument("--max-jobs", type=int, help="Exit after this many jobs.")
+    return parser.parse_args(arguments)
+
+def main(arguments):
+    args = parse_args(arguments)
+    LOG_PATH = f"worker_{datetime.now().strftime('%Y-%m-%d')}"
+
+    # Applies the logging and tracing settings of config.json to this process
+    from src.agent0_config import NewsConfigurator
+    NewsConfigurator(log_path=LOG_PATH)
+
+    settings = jobs_settings()
+    worker = Worker(open_queue(settings), args.kinds, LOG_PATH, poll_interval=settings["poll_interval"])
+    try:
+        worker.run(burst=args.burst, max_jobs=args.max_jobs)
+    finally:
+        export_tracing(f"{LOG_PATH}_{getpid()}", LOG_PATH)
+    return 0
+
+if __name__ == "__main__":
+    exit(main(argv[1:]))
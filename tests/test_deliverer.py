@@ -0,0 +1,168 @@
+import unittest
+from os import path
+from asyncio import sleep
+from socket import socket
+from json import loads
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+from smtplib import SMTP
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    Controller = None
+from src.agent5_deliver import NewsDeliverer
+from src.common.logs import configure_logging, writer
+
+class RecordingHandler:
+    """
+    SMTP handler that keeps every accepted message and refuses the configured recipients.
+    """
+    def __init__(self, refused=(), reply_delay=0):
+        self.refused = set(refused)
+        self.reply_delay = reply_delay
+        self.data_reply = "250 Message accepted for delivery"
+        self.messages = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refused:
+            return "550 mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(list(envelope.rcpt_tos))
+        await sleep(self.reply_delay)
+        return self.data_reply
+
+@unittest.skipUnless(Controller is not None, "aiosmtpd is not installed")
+class DelivererTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        # Keep the run logs out of the repository
+        log_dir = patch.object(writer, "logs_dir", self.tmp.name)
+        log_dir.start()
+        self.addCleanup(log_dir.stop)
+        configure_logging(level="ERROR", console=False)
+        self.addCleanup(configure_logging)
+
+    def start_server(self, refused=(), reply_delay=0):
+        handler = RecordingHandler(refused, reply_delay)
+        with socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        controller = Controller(handler, hostname="127.0.0.1", port=port)
+        controller.start()
+        self.addCleanup(controller.stop)
+        return handler, port
+
+    def deliverer(self, port, **overrides):
+        config = {
+            "logs": "test_deliver",
+            "paths": {"input": self.tmp.name, "output": self.tmp.name,
+                      "recipients": path.join(self.tmp.name, "recipients.txt")},
+            "smtp": {"host": "127.0.0.1", "port": port, "timeout": 10},
+            "sender": "newsletter@example.com",
+            "subject": "Newsletter",
+            "connections": 3,
+            "rate_limit": 0,
+            "sync_send_log": False
+        }
+        config.update(overrides)
+        return NewsDeliverer(log_path="test_deliver", config=config)
+
+    def send_log(self, edition):
+        with open(path.join(self.tmp.name, f"send_log_{edition}.jsonl"), "r", encoding="utf-8") as f:
+            return [loads(line) for line in f]
+
+    def test_every_recipient_gets_one_message(self):
+        handler, port = self.start_server()
+        recipients = [f"reader{idx}@example.com" for idx in range(10)]
+
+        stats = self.deliverer(port).deliver_newsletter("edition", "<p>News</p>", recipients)
+
+        self.assertEqual(stats, {"sent": 10, "failed": 0, "unconfirmed": 0})
+        delivered = [r for message in handler.messages for r in message]
+        self.assertEqual(sorted(delivered), sorted(recipients))
+
+    def test_rerun_sends_only_to_the_rest(self):
+        handler, port = self.start_server()
+        recipients = [f"reader{idx}@example.com" for idx in range(6)]
+        with open(path.join(self.tmp.name, "send_log_edition.jsonl"), "w", encoding="utf-8") as f:
+            f.write('{"status": "sent", "recipients": ["reader0@example.com", "reader1@example.com"]}\n')
+            # A torn line from an interrupted run is ignored
+            f.write('{"status": "sent", "recip')
+
+        stats = self.deliverer(port).deliver_newsletter("edition", "<p>News</p>", recipients)
+
+        self.assertEqual(stats["sent"], 4)
+        delivered = sorted(r for message in handler.messages for r in message)
+        self.assertEqual(delivered, recipients[2:])
+
+    def test_refused_recipients_are_logged_failed(self):
+        handler, port = self.start_server(refused={"gone@example.com"})
+        recipients = ["reader@example.com", "gone@example.com"]
+
+        stats = self.deliverer(port, connections=1).deliver_newsletter("edition", "<p>News</p>", recipients)
+
+        self.assertEqual(stats, {"sent": 1, "failed": 1, "unconfirmed": 0})
+        status = {r: entry["status"] for entry in self.send_log("edition") for r in entry["recipients"]}
+        self.assertEqual(status, {"reader@example.com": "sent", "gone@example.com": "failed"})
+        self.assertEqual(handler.messages, [["reader@example.com"]])
+
+    def test_pipelined_groups(self):
+        handler, port = self.start_server(refused={"gone@example.com"})
+        recipients = [f"reader{idx}@example.com" for idx in range(5)] + ["gone@example.com"]
+        # aiosmtpd reads pipelined commands in order but does not advertise the extension
+        has_extn = SMTP.has_extn
+        with patch.object(SMTP, "has_extn", lambda smtp, name: name == "pipelining" or has_extn(smtp, name)):
+            stats = self.deliverer(port, recipients_per_message=3).deliver_newsletter("edition", "<p>News</p>",
+                                                                                      recipients)
+
+        self.assertEqual(stats, {"sent": 5, "failed": 1, "unconfirmed": 0})
+        self.assertEqual(sorted(len(message) for message in handler.messages), [2, 3])
+
+    def test_group_errors_are_logged_failed(self):
+        _, port = self.start_server()
+        deliverer = self.deliverer(port, connections=1)
+
+        with patch.object(deliverer, "send_data", side_effect=UnicodeEncodeError("ascii", "ñ", 0, 1, "bad")):
+            stats = deliverer.deliver_newsletter("edition", "<p>News</p>", ["reader@example.com"])
+
+        self.assertEqual(stats, {"sent": 0, "failed": 1, "unconfirmed": 0})
+        self.assertEqual(self.send_log("edition")[-1]["status"], "failed")
+
+    def test_unacknowledged_data_stays_pending(self):
+        handler, port = self.start_server(reply_delay=1)
+        smtp = {"host": "127.0.0.1", "port": port, "timeout": 0.3}
+
+        stats = self.deliverer(port, connections=1, smtp=smtp).deliver_newsletter(
+            "edition", "<p>News</p>", ["reader@example.com"])
+
+        self.assertEqual(stats, {"sent": 0, "failed": 0, "unconfirmed": 1})
+        self.assertEqual(self.send_log("edition")[-1]["status"], "pending")
+
+        # The server accepted it after all, a rerun must not send it again
+        rerun = self.deliverer(port).deliver_newsletter("edition", "<p>News</p>", ["reader@example.com"])
+        self.assertEqual(rerun["sent"], 0)
+        self.assertEqual(len(handler.messages), 1)
+
+    def test_rejected_data_is_logged_failed(self):
+        handler, port = self.start_server()
+        handler.data_reply = "554 content rejected"
+
+        stats = self.deliverer(port, connections=1).deliver_newsletter("edition", "<p>News</p>", ["reader@example.com"])
+
+        self.assertEqual(stats, {"sent": 0, "failed": 1, "unconfirmed": 0})
+        self.assertEqual(self.send_log("edition")[-1]["status"], "failed")
+
+    def test_recipients_are_normalized(self):
+        _, port = self.start_server()
+        deliverer = self.deliverer(port)
+        with open(deliverer.RECIPIENTS_PATH, "w", encoding="utf-8") as f:
+            f.write("# readers\nreader@example.com\nlector@españa.es\nlector@xn--espaa-rta.es\nnoël@example.com\n\n")
+
+        self.assertEqual(deliverer.load_recipients(), ["reader@example.com", "lector@xn--espaa-rta.es"])
+
+if __name__ == "__main__":
+    unittest.main()
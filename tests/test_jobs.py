@@ -0,0 +1,112 @@
+import unittest
+from os import path
+from time import time, sleep
+from threading import Thread, Barrier
+from tempfile import TemporaryDirectory
+from src.common.jobs import JobQueue, JobTimeout, QUEUED, LEASED, DONE, DEAD
+
+class JobQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def open_queue(self, **settings):
+        return JobQueue(path.join(self.tmp.name, "jobs", "jobs.db"), **settings)
+
+    def job_row(self, queue, job_id):
+        with queue.connection() as db:
+            return dict(db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def test_racing_workers_lease_a_job_once(self):
+        queue = self.open_queue()
+        for attempt in range(20):
+            batch = f"race_{attempt}"
+            queue.enqueue(batch, "summarize", [{"n": attempt}])
+            barrier = Barrier(2)
+            leased = []
+
+            def lease(worker):
+                barrier.wait()
+                leased.append(queue.lease(["summarize"], worker))
+
+            threads = [Thread(target=lease, args=(f"worker-{idx}",)) for idx in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(sum(job is not None for job in leased), 1)
+            self.assertEqual(queue.counts(batch)[LEASED], 1)
+
+    def test_expired_lease_is_taken_over_then_dead_lettered(self):
+        queue = self.open_queue(lease_seconds=0.05, max_attempts=2)
+        (job_id,) = queue.enqueue("batch", "summarize", [{"n": 1}])
+
+        first = queue.lease(["summarize"], "worker-a")
+        self.assertEqual(first["attempts"], 1)
+        self.assertIsNone(queue.lease(["summarize"], "worker-b"))
+
+        sleep(0.1)
+        second = queue.lease(["summarize"], "worker-b")
+        self.assertEqual((second["id"], second["attempts"]), (job_id, 2))
+        # The first worker lost its lease, its heartbeat and result are ignored
+        self.assertFalse(queue.heartbeat(job_id, "worker-a"))
+        self.assertFalse(queue.complete(job_id, "worker-a", "late"))
+
+        sleep(0.1)
+        self.assertIsNone(queue.lease(["summarize"], "worker-c"))
+        row = self.job_row(queue, job_id)
+        self.assertEqual((row["status"], row["error"]), (DEAD, "lease expired"))
+
+    def test_failed_job_is_retried_after_a_backoff(self):
+        queue = self.open_queue(max_attempts=2, backoff=60)
+        (job_id,) = queue.enqueue("batch", "summarize", [{"n": 1}])
+
+        queue.lease(["summarize"], "worker")
+        before = time()
+        self.assertEqual(queue.fail(job_id, "worker", RuntimeError("boom")), QUEUED)
+        row = self.job_row(queue, job_id)
+        self.assertGreaterEqual(row["available_at"], before + 60)
+        self.assertEqual(row["error"], "boom")
+        # Waiting out the backoff, not available yet but still pending
+        self.assertIsNone(queue.lease(["summarize"], "worker"))
+        self.assertEqual(queue.pending(["summarize"]), 1)
+
+        with queue.connection() as db:
+            db.execute("UPDATE jobs SET available_at = ? WHERE id = ?", (time(), job_id))
+        queue.lease(["summarize"], "worker")
+        self.assertEqual(queue.fail(job_id, "worker", RuntimeError("boom")), DEAD)
+        self.assertEqual(queue.pending(["summarize"]), 0)
+
+    def test_cancel_and_requeue_dead(self):
+        queue = self.open_queue()
+        done_id, leased_id, queued_id = queue.enqueue("batch", "summarize", [{"n": 1}, {"n": 2}, {"n": 3}])
+        queue.lease(["summarize"], "worker")
+        queue.complete(done_id, "worker", {"summary": "ok"})
+        queue.lease(["summarize"], "worker")
+
+        self.assertEqual(queue.cancel("batch", "out of time"), 2)
+        self.assertEqual(queue.counts("batch"), {QUEUED: 0, LEASED: 0, DONE: 1, DEAD: 2})
+        # The cancelled job's late result is discarded
+        self.assertFalse(queue.complete(leased_id, "worker", {"summary": "late"}))
+        self.assertEqual([job["status"] for job in queue.results("batch")], [DONE, DEAD, DEAD])
+        self.assertEqual(queue.results("batch")[0]["result"], {"summary": "ok"})
+
+        self.assertEqual(queue.requeue_dead("other"), 0)
+        self.assertEqual(queue.requeue_dead("batch"), 2)
+        row = self.job_row(queue, queued_id)
+        self.assertEqual((row["status"], row["attempts"]), (QUEUED, 0))
+
+    def test_wait_times_out_and_stops_on_progress_errors(self):
+        queue = self.open_queue()
+        queue.enqueue("batch", "summarize", [{"n": 1}])
+        with self.assertRaises(JobTimeout):
+            queue.wait("batch", poll_interval=0.01, timeout=0.05)
+
+        def progress(counts):
+            raise RuntimeError("workers exited")
+        with self.assertRaises(RuntimeError):
+            queue.wait("batch", poll_interval=0.01, progress=progress)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from unittest.mock import patch
+from src.agent2_select import NewsSelector
+from src.agent2_select.matcher import KeywordMatcher, normalize_text
+
+class KeywordMatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.matcher = KeywordMatcher({
+            "Tecnologia": ["inteligencia artificial", "ai", "chip"],
+            "Economia": ["econom*", "tipos de interés", "banco"]
+        })
+
+    def test_phrases_match_as_a_whole(self):
+        matches = self.matcher.match("La Inteligencia Artificial llega", "Los tipos de interés suben.")
+        self.assertEqual(matches["Tecnologia"], {"inteligencia artificial"})
+        self.assertEqual(matches["Economia"], {"tipos de interés"})
+
+        matches = self.matcher.match("Inteligencia emocional y arte artificial", "")
+        self.assertEqual(matches["Tecnologia"], set())
+
+    def test_keywords_match_whole_words(self):
+        matches = self.matcher.match("Said the chips maker", "A bancoalimentario and a rain shower")
+        self.assertEqual(matches, {"Tecnologia": set(), "Economia": set()})
+
+        matches = self.matcher.match("AI, chip; banco.", "")
+        self.assertEqual(matches, {"Tecnologia": {"ai", "chip"}, "Economia": {"banco"}})
+
+    def test_prefix_keywords_match_any_word_they_begin(self):
+        matches = self.matcher.match("La economía crece", "Economists agree")
+        self.assertEqual(matches["Economia"], {"econom*"})
+
+        matches = self.matcher.match("Macroeconomía", "")
+        self.assertEqual(matches["Economia"], set())
+
+    def test_no_match_across_title_and_content(self):
+        matches = self.matcher.match("Una nueva inteligencia", "artificial")
+        self.assertEqual(matches["Tecnologia"], set())
+
+    def test_accents_are_folded(self):
+        self.assertEqual(normalize_text("Economía, ¡Año!"), "economia año")
+
+class SelectorLanguagesTest(unittest.TestCase):
+    def setUp(self):
+        characters = r"[^\w\s]"
+        self.selector = NewsSelector(log_path="test_select", config={
+            "logs": "test_select",
+            "paths": {"input": ".", "output": "."},
+            "score_threshold": 10,
+            "max_news_per_block": 3,
+            "patterns_to_remove": [],
+            "languages": {
+                "en": {"characters": characters, "stopwords": "english",
+                       "content_blocks": {"Tecnologia": ["artificial intelligence"], "Economia": ["rates"]}},
+                "es": {"characters": characters, "stopwords": "spanish",
+                       "content_blocks": {"Tecnologia": ["inteligencia artificial"], "Economia": ["tipos"]}}
+            }
+        })
+
+    def test_each_language_uses_its_own_blocks(self):
+        news = [{"title": "La inteligencia artificial avanza", "content": "Texto en español."},
+                {"title": "Artificial intelligence grows", "content": "Text in English."}]
+        languages = iter(["es", "en"])
+        with patch.object(NewsSelector, "language_detection", side_effect=lambda text: next(languages)):
+            result = self.selector.categorize_news(news)
+
+        self.assertEqual([item["title"] for item in result["sections"]["Tecnologia"]],
+                         ["La inteligencia artificial avanza", "Artificial intelligence grows"])
+        self.assertEqual([item["languages"] for item in result["sections"]["Tecnologia"]], ["es", "en"])
+
+if __name__ == "__main__":
+    unittest.main()